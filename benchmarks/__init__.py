@@ -0,0 +1,4 @@
+# benchmarks.__init__.py
+#
+# The throughput benchmarks of socialmeter. Run them with
+# `python -m benchmarks.run`.
@@ -0,0 +1,80 @@
+# corpus.py
+#
+# This file generates the synthetic tweets the benchmarks run on. The
+# corpus only depends on its seed, so runs on different versions of
+# socialmeter measure the same texts.
+
+import random
+
+POSITIVE = ["love", "great", "happy", "awesome", "good", "best", "win",
+            "amazing", "fun", "nice"]
+NEGATIVE = ["hate", "bad", "sad", "awful", "worst", "lose", "terrible",
+            "boring", "angry", "ugly"]
+NEUTRAL = ["the", "a", "game", "today", "phone", "is", "this", "my",
+           "with", "and", "new", "we", "went", "to", "see", "movie",
+           "not", "really", "so", "just", "at", "it", "was", "for"]
+HASHTAGS = ["#win", "#fail", "#monday", "#music", "#news", "#love",
+            "#sports", "#tbt"]
+MENTIONS = ["@alice", "@bob", "@news", "@team", "@friend"]
+POSITIVE_EMOTICONS = [":)", ":-)", ":D", "<3", ";)"]
+NEGATIVE_EMOTICONS = [":(", ":-(", ":'(", "D:", ":/"]
+PUNCTUATION = ["!!!", "?!?", "...", "!!", "?"]
+
+
+def emoticon_lexicon():
+    """
+    Returns the lines of an EmoticonSentimentFE lexicon for the
+    emoticons of the corpus.
+    """
+    lines = ["{}\t1".format(e) for e in POSITIVE_EMOTICONS]
+    lines += ["{}\t-1".format(e) for e in NEGATIVE_EMOTICONS]
+    return "\n".join(lines) + "\n"
+
+
+def tweet(rng):
+    """
+    Returns a synthetic tweet and its sentiment ("1" or "0").
+    """
+    positive = rng.random() < 0.5
+    sentiment_words = POSITIVE if positive else NEGATIVE
+    emoticons = POSITIVE_EMOTICONS if positive else NEGATIVE_EMOTICONS
+
+    words = list()
+    for _ in range(rng.randint(4, 16)):
+        r = rng.random()
+        if r < 0.2:
+            w = rng.choice(sentiment_words)
+        else:
+            w = rng.choice(NEUTRAL)
+        if rng.random() < 0.1:
+            w = w.upper()
+        words.append(w)
+
+    if rng.random() < 0.4:
+        words.insert(rng.randint(0, len(words)), rng.choice(MENTIONS))
+    for _ in range(rng.randint(0, 3)):
+        words.append(rng.choice(HASHTAGS))
+    if rng.random() < 0.5:
+        words.append(rng.choice(emoticons))
+    if rng.random() < 0.3:
+        words[-1] += rng.choice(PUNCTUATION)
+
+    text = " ".join(words)
+    if rng.random() < 0.1:
+        text = "RT {}: {}".format(rng.choice(MENTIONS), text)
+    return (text, "1" if positive else "0")
+
+
+def corpus(n, seed=0):
+    """
+    Returns n synthetic tweets and their sentiments as a (texts,
+    sentiments) tuple, like the training data of an SMeter.
+    """
+    rng = random.Random(seed)
+    texts = list()
+    sentiments = list()
+    for _ in range(n):
+        t, s = tweet(rng)
+        texts.append(t)
+        sentiments.append(s)
+    return (texts, sentiments)
@@ -0,0 +1,314 @@
+# run.py
+#
+# This file runs the throughput benchmarks of every tokenizer,
+# preprocessor, feature extractor, classifier and output module, and
+# of full SMeter chains, on a synthetic corpus. The results are
+# written as JSON so runs on the same machine can be compared across
+# versions:
+#
+#   python -m benchmarks.run --records 2000 --output results.json
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import socialmeter as sm
+from socialmeter import classif as cl
+from socialmeter import output as out
+from socialmeter import preclass as pc
+from socialmeter import preprocess as pp
+from socialmeter import tokenizers
+from socialmeter.chain_links import Link, Record
+
+from benchmarks.corpus import corpus, emoticon_lexicon, NEUTRAL
+
+# The extractors whose features the classifier benchmarks train on.
+# They do not need any NLTK data, so every classifier can be measured.
+CLASSIFIER_FEATURES = ["ExcessiveCapitalsFE", "HashtagCountFE",
+                       "EmoticonSentimentFE"]
+
+
+def summarize(latencies, seconds, n):
+    """
+    Returns the stats of n records that took `seconds`, with the
+    latencies of each call if there was a call per record.
+    """
+    result = {"records": n, "seconds": seconds,
+              "records_per_second": n / seconds if seconds > 0 else 0.0}
+    if len(latencies) > 0:
+        latencies = sorted(latencies)
+        result["mean_ms"] = sum(latencies) / len(latencies) * 1000
+        result["p50_ms"] = latencies[len(latencies) // 2] * 1000
+        result["p99_ms"] = latencies[len(latencies) * 99 // 100] * 1000
+    return result
+
+
+def measure(function, items):
+    """
+    Calls function with each item and returns the per-call stats.
+    """
+    latencies = list()
+    start = time.perf_counter()
+    for item in items:
+        t = time.perf_counter()
+        function(item)
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - start, len(items))
+
+
+def measure_once(function, n):
+    """
+    Calls function once, and returns the stats of it handling n
+    records.
+    """
+    start = time.perf_counter()
+    function()
+    return summarize([], time.perf_counter() - start, n)
+
+
+def run_safely(results, name, bench):
+    """
+    Stores the result of bench() under name, or the error it raised
+    (for example a LookupError when NLTK data is not installed).
+    """
+    try:
+        results[name] = bench()
+    except Exception as e:
+        message = " ".join(str(e).replace("*", "").split())
+        results[name] = {"error": "{}: {}".format(type(e).__name__,
+                                                  message[:200])}
+
+
+def classes(package):
+    return sorted((name, c) for (name, c) in vars(package).items()
+                  if isinstance(c, type))
+
+
+def make_extractor(cls):
+    e = cls()
+    if isinstance(e, pc.EmoticonSentimentFE):
+        e.set_file(io.StringIO(emoticon_lexicon()))
+    elif isinstance(e, pp.StopWordsPreprocessor):
+        e.add_stop_words(NEUTRAL[:10])
+    return e
+
+
+def bench_tokenizers(texts):
+    """
+    Measures every tokenizer, and the share of texts each one tokenizes
+    the same as nltk.word_tokenize.
+    """
+    results = dict()
+    for (name, cls) in sorted(tokenizers.TOKENIZERS.items()):
+        run_safely(results, name,
+                   lambda: measure(cls().tokenize, texts))
+
+    def agreement():
+        reference = tokenizers.NLTKTokenizer()
+        r = dict()
+        for (name, cls) in sorted(tokenizers.TOKENIZERS.items()):
+            t = cls()
+            same = sum(1 for text in texts
+                       if t.tokenize(text) == reference.tokenize(text))
+            r[name] = same / len(texts)
+        return r
+
+    run_safely(results, "agreement_with_nltk", agreement)
+    return results
+
+
+def bench_preprocessors(texts):
+    results = dict()
+    for (name, cls) in classes(pp):
+        run_safely(results, name,
+                   lambda: measure(make_extractor(cls).extract, texts))
+    return results
+
+
+def bench_extractors(texts):
+    results = dict()
+    for (name, cls) in classes(pc):
+        run_safely(results, name,
+                   lambda: measure(make_extractor(cls).extract, texts))
+    return results
+
+
+def feature_matrix(texts):
+    extractors = [make_extractor(getattr(pc, n)) for n in CLASSIFIER_FEATURES]
+    return [[e.extract(t) for e in extractors] for t in texts]
+
+
+def bench_classifier(cls, features, sentiments):
+    mod = cls()
+    if isinstance(mod, cl.NBClassifierModule):
+        # NBClassifierModule also takes the preclass link to train
+        def train():
+            mod.train(Link(None), (features, sentiments))
+    else:
+        def train():
+            mod.train((features, sentiments))
+
+    result = dict()
+    result["train"] = measure_once(train, len(features))
+    result["predict_batch"] = measure_once(lambda: mod.classify(features),
+                                           len(features))
+    result["predict_single"] = measure(lambda f: mod.classify([f]),
+                                       features)
+    return result
+
+
+def bench_classifiers(texts, sentiments):
+    features = feature_matrix(texts)
+    results = dict()
+    for name in sorted(cl.__all__):
+        run_safely(results, name,
+                   lambda: bench_classifier(getattr(cl, name), features,
+                                            sentiments))
+    return results
+
+
+def output_records(texts, sentiments):
+    index = {"text": 0, "classification": 1}
+    return [Record(index, [t, s]) for (t, s) in zip(texts, sentiments)]
+
+
+def bench_outputs(texts, sentiments, directory):
+    results = dict()
+
+    run_safely(results, "OutputModule", lambda: measure(
+        out.OutputModule().process, output_records(texts, sentiments)))
+
+    def sqlite(batch):
+        filename = os.path.join(directory, "bench-{}.db".format(batch))
+        mod = out.SQLiteModule()
+        mod.setup_db(filename)
+        mod.connect_to_db(filename)
+        records = output_records(texts, sentiments)
+        if batch:
+            return measure_once(lambda: mod.process_batch(records),
+                                len(records))
+        return measure(mod.process, records)
+
+    run_safely(results, "SQLiteModule", lambda: sqlite(False))
+    run_safely(results, "SQLiteModule.process_batch", lambda: sqlite(True))
+
+    def textcloud():
+        mod = out.TextCloudModule()
+        # Never draw, only measure the queueing of each record
+        mod.delay = float("inf")
+        mod.displayed_rows.append(0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return measure(mod.process, output_records(texts, sentiments))
+
+    run_safely(results, "TextCloudModule", textcloud)
+    return results
+
+
+def create_meter(nltk, tokenizer=None):
+    """
+    Returns an SMeter with the preprocessors and extractors that do not
+    need NLTK data, or with the ones that do if nltk is True. The meter
+    tokenizes with tokenizer, None for the default.
+    """
+    meter = sm.SMeter()
+    meter.set_column_format(["text", "classification"])
+    if tokenizer is not None:
+        meter.set_tokenizer(tokenizer)
+    if nltk:
+        preprocessors = [pp.TokenizerPreprocessor, pp.POSTagPreprocessor]
+        extractors = [pc.AdjectiveCounterFE, pc.ExcessivePunctuationFE,
+                      pc.NegativeInfluenceFE, pc.WordCountFE]
+    else:
+        preprocessors = [pp.HashtagPreprocessor, pp.StopWordsPreprocessor]
+        extractors = [getattr(pc, n) for n in CLASSIFIER_FEATURES]
+    for p in preprocessors:
+        meter.add_preprocess_mod(sm.PreprocessorExtractorModule(
+            make_extractor(p)))
+    for e in extractors:
+        meter.add_preclass_mod(sm.FeatureExtractorModule(make_extractor(e)))
+    meter.set_class_mod(cl.DecisionTreeModule())
+    meter.set_output_mod(out.OutputModule())
+    meter.set_handler(lambda data: None)
+    return meter
+
+
+def bench_chain(nltk, texts, sentiments, tokenizer=None):
+    meter = create_meter(nltk, tokenizer)
+    result = dict()
+    result["train"] = measure_once(lambda: meter.train((texts, sentiments)),
+                                   len(texts))
+    meter.set_classifier_keys()
+    inputs = [{"text": t} for t in texts]
+    result["stream"] = measure(meter.new_input, inputs)
+    result["process_batch"] = measure_once(
+        lambda: meter.process_batch(inputs), len(inputs))
+    result["classify_many"] = measure_once(
+        lambda: meter.classify_many(texts), len(texts))
+    return result
+
+
+def bench_chains(texts, sentiments):
+    results = dict()
+    run_safely(results, "no_nltk", lambda: bench_chain(False, texts,
+                                                       sentiments))
+    run_safely(results, "nltk", lambda: bench_chain(True, texts, sentiments))
+    # The NLTK chain again, tokenizing with the RegexTokenizer instead
+    # of word_tokenize
+    run_safely(results, "nltk_regex_tokenizer",
+               lambda: bench_chain(True, texts, sentiments, "regex"))
+    return results
+
+
+def run(n_records=2000, seed=0):
+    """
+    Runs every benchmark on a corpus of n_records texts and returns the
+    results as a dict.
+    """
+    texts, sentiments = corpus(n_records, seed)
+    results = {
+        "socialmeter": sm.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "records": n_records,
+        "seed": seed,
+    }
+    results["tokenizers"] = bench_tokenizers(texts)
+    results["preprocess"] = bench_preprocessors(texts)
+    results["preclass"] = bench_extractors(texts)
+    results["classif"] = bench_classifiers(texts, sentiments)
+    with tempfile.TemporaryDirectory() as directory:
+        results["output"] = bench_outputs(texts, sentiments, directory)
+    results["chains"] = bench_chains(texts, sentiments)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.run",
+        description="Measures the throughput of the socialmeter modules.")
+    parser.add_argument('--records', metavar='n', type=int, default=2000,
+                        help='The number of synthetic texts to run.')
+    parser.add_argument('--seed', metavar='seed', type=int, default=0,
+                        help='The seed of the synthetic corpus.')
+    parser.add_argument('--output', metavar='file', type=str,
+                        help='The file the JSON results are written to. \
+                        They are printed if it is not given.')
+    args = parser.parse_args(argv)
+
+    results = run(args.records, args.seed)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
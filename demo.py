@@ -55,7 +55,7 @@ def create_smeter():
     config_filename = "configs/config.json"
     if twitter:
         # Load JSON configuration add use it to configure the TSModule
-        ts = inp.twitterstream.TwitterStreamModule()
+        ts = inp.TwitterStreamModule()
         ts.load_config(config_filename)
         ts.set_term("Donald Trump")
         meter.set_input_mod(ts)
@@ -1,9 +1,16 @@
 __version__ = '0.4.0'
 
+from socialmeter.lazy import lazy_module
+
 # === Chain and links ===
 from socialmeter.chain_links import SMeter
 from socialmeter.chain_links import FeatureExtractorModule
 from socialmeter.chain_links import PreprocessorExtractorModule
+from socialmeter.chain_links import Record
+from socialmeter.group import MeterGroup
 
 # === Tests ===
-from socialmeter.testsuite.kfold import KFoldValidationTest
+# Imported when first used, since they import sklearn
+lazy_module(globals(), {
+    "KFoldValidationTest": ".testsuite.kfold",
+})
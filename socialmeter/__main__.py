@@ -5,8 +5,9 @@
 
 import argparse
 import importlib
+import os
 
-from socialmeter.testsuite import kfold, grid_search
+from socialmeter import SMeter
 
 parser = argparse.ArgumentParser(
     prog="SocialMeter",
@@ -23,11 +24,39 @@ parser.add_argument('action', metavar='action', type=str,
 parser.add_argument('--multiple', action='store_const', const='multiple',
                     help='Test multiple meter objects from the file. Note \
                     the file must implement \`create_smeters\'')
+parser.add_argument('--model', metavar='model', type=str,
+                    help='A file to load the trained meter from when \
+                    running a demo. If the file does not exist, the meter \
+                    is trained and then saved to it.')
+parser.add_argument('--workers', metavar='n', type=int, default=1,
+                    help='The number of processes used to extract \
+                    features for training and testing.')
+
+parser.add_argument('--profile', metavar='directory', type=str,
+                    help='Profile the stages and modules of the meter(s) \
+                    with cProfile and write the .prof files to the \
+                    directory.')
+parser.add_argument('--profile-records', metavar='n', type=int,
+                    default=1000,
+                    help='The number of records of each stage and module \
+                    that are profiled.')
+parser.add_argument('--profile-stages', metavar='stages', type=str,
+                    help='A comma separated list of the stages and modules \
+                    to profile, for example "extract,preclass/word-count". \
+                    All of them are profiled by default.')
+parser.add_argument('--profile-memory', action='store_true',
+                    help='Also record the allocations of the profiled \
+                    stages and modules with tracemalloc.')
 
 args = parser.parse_args()
 action = args.action
 multiple = args.multiple
 filename = args.filename
+workers = args.workers
+model = args.model
+profile = args.profile
+
+profiled_meters = list()
 
 modulename = filename.split('.')[0]
 
@@ -51,6 +80,8 @@ def meter_from_file():
         parser.error("Could not find function \"create_smeter\" in the input "
                      + "file \"{}\". Please define the function in your file."
                      .format(filename))
+    meter.set_parallelism(workers)
+    profile_meter(meter, profile)
     return meter
 
 
@@ -62,9 +93,29 @@ def meters_from_file():
         parser.error(("Could not find function \"create_smeters\" in the input"
                      + " file \"{}\". Please define the function in your"
                      + " file.").format(filename))
+    for n, m in enumerate(meters):
+        m.set_parallelism(workers)
+        profile_meter(m, os.path.join(profile or "", "meter-{}".format(n)))
     return meters
 
 
+def profile_meter(meter, directory):
+    if profile is None:
+        return
+    stages = None
+    if args.profile_stages is not None:
+        stages = args.profile_stages.split(',')
+    meter.enable_profiling(stages, args.profile_records,
+                           memory=args.profile_memory, directory=directory)
+    profiled_meters.append(meter)
+
+
+def dump_profiles():
+    for meter in profiled_meters:
+        for f in meter.disable_profiling():
+            print("Wrote profile {}".format(f))
+
+
 def training_data_from_file():
     t_datas = None
     if hasattr(i, "training_data"):
@@ -87,6 +138,7 @@ input file \"{}\". Please define the function in your file".format(filename))
 
 
 def test_single_meter():
+    from socialmeter.testsuite import kfold
     meter = meter_from_file()
     t_datas = training_data_from_file()
     print("Starting test with SMeter {}".format(meter))
@@ -97,6 +149,7 @@ def test_single_meter():
 
 
 def test_multiple_meters():
+    from socialmeter.testsuite import kfold
     meters = meters_from_file()
     t_datas = training_data_from_file()
     print("Starting test with {} SMeters and {} data points."
@@ -122,6 +175,7 @@ def test_multiple_meters():
 
 
 def grid_search_meter():
+    from socialmeter.testsuite import grid_search
     meter = meter_from_file()
     t_datas = training_data_from_file()
     parameters = grid_search_params()
@@ -142,9 +196,22 @@ sorted by mean_test_score:")
 
 def run_demo():
     meter = meter_from_file()
-    t_datas = training_data_from_file()
-    print("Starting demo with SMeter {}".format(meter))
-    meter.train(t_datas)
+    if model is not None and os.path.exists(model):
+        # Use the trained meter, with the input and output modules
+        # of the meter from the file
+        trained = SMeter.load(model)
+        trained.set_input_mod(meter.input_mod)
+        trained.set_output_mod(meter.output_mod)
+        meter = trained
+        profile_meter(meter, profile)
+        print("Starting demo with SMeter {} loaded from {}"
+              .format(meter, model))
+    else:
+        t_datas = training_data_from_file()
+        print("Starting demo with SMeter {}".format(meter))
+        meter.train(t_datas)
+        if model is not None:
+            meter.save(model)
 
     def handler(data):
         # Check if it is None -- if it is None, it's likely that
@@ -157,15 +224,18 @@ def run_demo():
 
 
 # We have the meter object, now we can see what they want to do
-# with it.
-if action == "test":
-    if multiple is None:
-        test_single_meter()
+# with it. The profiles are written even if a demo is interrupted.
+try:
+    if action == "test":
+        if multiple is None:
+            test_single_meter()
+        else:
+            test_multiple_meters()
+    elif action == "grid-search":
+        grid_search_meter()
+    elif action == "demo":
+        run_demo()
     else:
-        test_multiple_meters()
-elif action == "grid-search":
-    grid_search_meter()
-elif action == "demo":
-    run_demo()
-else:
-    parser.error("Unrecognized action \"{}\".".format(action))
+        parser.error("Unrecognized action \"{}\".".format(action))
+finally:
+    dump_profiles()
@@ -0,0 +1,181 @@
+# analysis.py
+#
+# This file defines the per-text analysis shared by the extractors of
+# a chain, and the plan of which parts of it the extractors need.
+
+
+def _tokens(analysis):
+    tokenizer = analysis.tokenizer
+    if tokenizer is None:
+        from socialmeter import tokenizers
+        tokenizer = tokenizers.get_tokenizer()
+    return tokenizer.tokenize(analysis.text)
+
+
+def _pos_tags(analysis):
+    from socialmeter import tagger
+    return tagger.pos_tag(analysis.get("tokens"))
+
+
+def _lower_tokens(analysis):
+    return [t.lower() for t in analysis.get("tokens")]
+
+
+def _words(analysis):
+    return analysis.text.split(' ')
+
+
+def _entities(analysis):
+    from socialmeter import entities
+    return entities.scan(analysis.text)
+
+
+def _spans(kind):
+    # (start, end, name) of every entity of kind, where the span starts
+    # at the character before the '#' or '@' and name does not include
+    # the '#' or '@'.
+    def spans(analysis):
+        return [(start - 1, end, value[1:])
+                for (k, start, end, value) in analysis.get("entities")
+                if k == kind]
+    return spans
+
+
+def _emoticons(analysis):
+    return [value for (k, _, _, value) in analysis.get("entities")
+            if k == "emoticon"]
+
+
+# The artifacts that can be computed from a text. Each artifact has the
+# names of the artifacts it is computed from and the function that
+# computes it from a TextAnalysis.
+ARTIFACTS = {
+    "tokens": ((), _tokens),
+    "pos_tags": (("tokens",), _pos_tags),
+    "lower_tokens": (("tokens",), _lower_tokens),
+    "words": ((), _words),
+    "entities": ((), _entities),
+    "hashtags": (("entities",), _spans("hashtag")),
+    "mentions": (("entities",), _spans("mention")),
+    "emoticons": (("entities",), _emoticons),
+}
+
+
+def register_artifact(name, function, requires=()):
+    """
+    Registers a new artifact that extractors can require. function is
+    called with the TextAnalysis and should use analysis.get() for the
+    artifacts in requires.
+    """
+    ARTIFACTS[name] = (tuple(requires), function)
+
+
+class TextAnalysis:
+    """
+    TextAnalysis holds the artifacts (tokens, POS tags, hashtags, etc.)
+    computed from a single text, so that each of them is only computed
+    once per record no matter how many extractors need it.
+
+    An artifact is computed the first time it is requested with get()
+    and then cached on the object. The available artifacts are:
+    "tokens" - the tokens of the text (see socialmeter.tokenizers)
+    "pos_tags" - the POS tags of the tokens (see socialmeter.tagger)
+    "lower_tokens" - the tokens in lower case
+    "words" - the text split on spaces
+    "entities" - the hashtags, mentions, URLs, emoticons and
+                 punctuation runs of the text (see socialmeter.entities)
+    "hashtags" - (start, end, tag) of each hashtag in the text
+    "mentions" - (start, end, name) of each mention in the text
+    "emoticons" - each emoticon in the text
+
+    Artifacts are shared between extractors, so they should be treated
+    as read-only.
+
+    Members
+    -------
+    text : String
+    The text that is analyzed.
+
+    tokenizer : Object
+    The tokenizer of the "tokens" artifact, or None for the default
+    tokenizer of the process.
+    """
+    __slots__ = ('text', 'artifacts', 'tokenizer')
+
+    def __init__(self, text, tokenizer=None):
+        self.text = text
+        self.artifacts = dict()
+        self.tokenizer = tokenizer
+
+    def get(self, name):
+        """
+        Returns the artifact with name `name`, computing it if it has
+        not been computed yet.
+        """
+        try:
+            return self.artifacts[name]
+        except KeyError:
+            value = ARTIFACTS[name][1](self)
+            self.artifacts[name] = value
+            return value
+
+    def set(self, name, value):
+        self.artifacts[name] = value
+
+    def tokens(self):
+        return self.get("tokens")
+
+    def pos_tags(self):
+        return self.get("pos_tags")
+
+
+class ExtractionPlan:
+    """
+    ExtractionPlan works out which artifacts a set of extractors need
+    from the `requires` declared by each of them, including the
+    artifacts those are computed from, and the order to compute them
+    in. The SMeter builds one when it starts so that an unknown
+    requirement is an error up front, and so that only the artifacts
+    some extractor actually needs are computed.
+
+    Members
+    -------
+    artifacts : List(String)
+    The names of the needed artifacts, each after the artifacts it is
+    computed from.
+    """
+    def __init__(self, extractors):
+        self.artifacts = list()
+        for e in extractors:
+            for name in getattr(e, "requires", ()):
+                self._add(name, e, list())
+
+    def _add(self, name, extractor, visiting):
+        if name in self.artifacts:
+            return
+        if name not in ARTIFACTS:
+            raise ValueError("{} requires the unknown artifact \"{}\"."
+                             .format(extractor, name))
+        if name in visiting:
+            raise ValueError("The artifact \"{}\" requires itself."
+                             .format(name))
+        visiting.append(name)
+        for r in ARTIFACTS[name][0]:
+            self._add(r, extractor, visiting)
+        visiting.pop()
+        self.artifacts.append(name)
+
+    def needs(self, name):
+        return name in self.artifacts
+
+    def analyze(self, text, analysis=None):
+        """
+        Computes every artifact of the plan for text and returns the
+        TextAnalysis. If analysis is given, the artifacts it already
+        has are reused.
+        """
+        if analysis is None:
+            analysis = TextAnalysis(text)
+        for name in self.artifacts:
+            analysis.get(name)
+        return analysis
@@ -0,0 +1,198 @@
+# batching.py
+#
+# This file defines the micro-batcher that the SMeter can use to
+# classify streaming records in small batches.
+
+from collections import deque
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    MicroBatcher sits between the preclass stage and the classifier of
+    an SMeter. Instead of classifying each record on its own, records
+    are held until either max_batch records are waiting or the oldest
+    one has waited max_delay_ms milliseconds. The held records are then
+    classified with one call to the classifier module's process_batch,
+    and passed on to the output module in the order they arrived.
+
+    If target_p99_ms is set, max_batch is tuned after each batch: it is
+    halved while the 99th percentile latency (from the time a record
+    reaches the batcher to the time it is classified) is over the
+    target, and grown while it is under half of the target. Note that
+    max_delay_ms should be below the target, since a record can wait
+    that long for a batch to fill.
+
+    Members
+    -------
+    max_batch : Int
+    The number of records that are classified together.
+
+    max_delay_ms : Float
+    The longest time a record waits for its batch to fill.
+
+    target_p99_ms : Float
+    The 99th percentile latency max_batch is tuned for, or None to
+    not tune it.
+
+    If classifying a batch fails, its records are classified one at a
+    time so that only the records that fail are dropped. Dropped
+    records are logged to the socialmeter.batching logger and counted
+    in errors.
+    """
+    def __init__(self, max_batch=64, max_delay_ms=20, target_p99_ms=None,
+                 min_batch=1, max_batch_limit=4096):
+        self.max_batch = max_batch
+        self.max_delay_ms = max_delay_ms
+        self.target_p99_ms = target_p99_ms
+        self.min_batch = min_batch
+        self.max_batch_limit = max_batch_limit
+
+        self.meter = None
+        self.buffer = list()
+        self.cond = threading.Condition()
+        # Held while a batch is taken from the buffer, classified and
+        # released, so batches are released in the order they arrived.
+        self.flush_lock = threading.Lock()
+        self.thread = None
+        self.stopped = False
+
+        self.latencies = deque(maxlen=1000)
+        self.batches = 0
+        self.records = 0
+        self.errors = 0
+
+    def start(self, meter):
+        """
+        Starts the thread that classifies batches whose oldest record
+        has waited max_delay_ms. Classified records are passed to
+        meter.finished_classify.
+        """
+        self.meter = meter
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run,
+                                       name="MicroBatcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Classifies the records that are still waiting and stops the
+        thread.
+        """
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.flush()
+
+    def submit(self, data):
+        """
+        Adds a record to the current batch, classifying the batch if it
+        is full.
+        """
+        with self.cond:
+            self.buffer.append((data, time.perf_counter()))
+            full = len(self.buffer) >= self.max_batch
+            if len(self.buffer) == 1:
+                # Wake the thread so it waits for this record's deadline
+                self.cond.notify()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Classifies and releases every record that is waiting.
+        """
+        with self.flush_lock:
+            with self.cond:
+                batch = self.buffer
+                self.buffer = list()
+            if len(batch) > 0:
+                self._classify(batch)
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        p99 = 0.0
+        if len(latencies) > 0:
+            p99 = latencies[min(len(latencies) - 1,
+                                len(latencies) * 99 // 100)] * 1000
+        return {"batches": self.batches,
+                "records": self.records,
+                "max_batch": self.max_batch,
+                "waiting": len(self.buffer),
+                "errors": self.errors,
+                "p99_ms": p99}
+
+    def _classify(self, batch):
+        meter = self.meter
+        records = [r for (r, _) in batch]
+        try:
+            records = meter.run_stage("classify",
+                                      meter.class_mod.process_batch,
+                                      records, len(records))
+        except Exception:
+            logger.exception("Classifying a batch of %d records failed, "
+                             "classifying them one at a time.",
+                             len(records))
+            records = self._classify_each(records)
+
+        now = time.perf_counter()
+        for (_, arrived) in batch:
+            self.latencies.append(now - arrived)
+        self.batches += 1
+        self.records += len(batch)
+        self._tune()
+
+        for r in records:
+            try:
+                meter.finished_classify(r)
+            except Exception:
+                self.errors += 1
+                logger.exception("Outputting a record failed, it was "
+                                 "dropped.")
+
+    def _classify_each(self, records):
+        meter = self.meter
+        classified = list()
+        for r in records:
+            try:
+                classified.append(meter.run_stage(
+                    "classify", meter.class_mod.process, r))
+            except Exception:
+                self.errors += 1
+                logger.exception("Classifying a record failed, it was "
+                                 "dropped.")
+        return classified
+
+    def _tune(self):
+        if self.target_p99_ms is None or len(self.latencies) < 20:
+            return
+        latencies = sorted(self.latencies)
+        p99 = latencies[len(latencies) * 99 // 100] * 1000
+        if p99 > self.target_p99_ms:
+            self.max_batch = max(self.min_batch, self.max_batch // 2)
+            # Measure the new batch size from scratch
+            self.latencies.clear()
+        elif p99 < self.target_p99_ms / 2:
+            self.max_batch = min(self.max_batch_limit,
+                                 self.max_batch + max(1, self.max_batch // 8))
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while len(self.buffer) == 0 and not self.stopped:
+                    self.cond.wait()
+                if self.stopped:
+                    return
+                deadline = self.buffer[0][1] + self.max_delay_ms / 1000
+                remaining = deadline - time.perf_counter()
+                if remaining > 0:
+                    self.cond.wait(remaining)
+                    continue
+            self.flush()
@@ -0,0 +1,150 @@
+# cache.py
+#
+# This file defines the cache of feature vectors used by the SMeter to
+# avoid extracting the features of the same text more than once.
+
+from collections import OrderedDict
+import hashlib
+import pickle
+import sqlite3
+import threading
+
+
+class FeatureCache:
+    """
+    FeatureCache stores the feature vectors of texts so that identical
+    texts (retweets, copy-pasted spam, the same corpus in several
+    k-fold runs) are only extracted once.
+
+    Vectors are keyed by a hash of the text and of the configuration
+    of the feature extractors that produced them (see key_for), so
+    changing the extractors never returns stale features. The cache
+    keeps at most max_entries vectors in memory and evicts the least
+    recently used ones first.
+
+    If a filename is given, vectors are also stored in a SQLite
+    database so the cache survives restarts and can be shared between
+    runs on the same corpus. Writes to the database are committed in
+    groups, call flush() (or close()) to commit the rest.
+
+    Members
+    -------
+    max_entries : Int
+    The maximum number of vectors kept in memory.
+
+    hits, misses, evictions : Int
+    Counters of the lookups and evictions of the cache.
+    """
+    def __init__(self, max_entries=100000, filename=None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.connection = None
+        self.pending_writes = 0
+        self.commit_interval = 500
+        if filename is not None:
+            self.connection = sqlite3.connect(filename,
+                                              check_same_thread=False)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS features \
+(key TEXT PRIMARY KEY, features BLOB)")
+            self.connection.commit()
+
+    def key_for(self, signature, text):
+        """
+        Returns the key of text for extractors with the configuration
+        signature (see SMeter.feature_signature).
+        """
+        h = hashlib.sha1(signature.encode('utf-8'))
+        h.update(b'\0')
+        h.update(text.encode('utf-8'))
+        return h.hexdigest()
+
+    def get(self, key):
+        """
+        Returns a copy of the feature vector stored for key, or None if
+        there is none.
+        """
+        with self.lock:
+            features = self.entries.get(key)
+            if features is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return list(features)
+
+            if self.connection is not None:
+                row = self.connection.execute(
+                    "SELECT features FROM features WHERE key = ?",
+                    (key,)).fetchone()
+                if row is not None:
+                    features = pickle.loads(row[0])
+                    self._store(key, features)
+                    self.hits += 1
+                    return list(features)
+
+            self.misses += 1
+            return None
+
+    def put(self, key, features):
+        """
+        Stores the feature vector features for key.
+        """
+        features = list(features)
+        with self.lock:
+            self._store(key, features)
+            if self.connection is not None:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO features VALUES (?, ?)",
+                    (key, pickle.dumps(features)))
+                self.pending_writes += 1
+                if self.pending_writes >= self.commit_interval:
+                    self.connection.commit()
+                    self.pending_writes = 0
+
+    def flush(self):
+        """
+        Commits the vectors not yet committed to the database.
+        """
+        with self.lock:
+            if self.connection is not None and self.pending_writes > 0:
+                self.connection.commit()
+                self.pending_writes = 0
+
+    def close(self):
+        self.flush()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def clear(self):
+        """
+        Removes every vector from memory (but not from the database).
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Returns a dict of the cache's counters, its size and hit rate.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            hit_rate = 0.0
+            if lookups > 0:
+                hit_rate = self.hits / lookups
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "entries": len(self.entries),
+                    "hit_rate": hit_rate}
+
+    def _store(self, key, features):
+        self.entries[key] = features
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
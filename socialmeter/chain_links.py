@@ -1,6 +1,154 @@
 # chain-links.py
 
-import pandas as pd
+import os
+import pickle
+import sys
+from bisect import bisect_left
+
+from socialmeter import sparse
+from socialmeter.analysis import ExtractionPlan, TextAnalysis
+from socialmeter.stats import ChainStats
+
+# numpy, pandas, multiprocessing and asyncio are imported by the
+# methods that use them, so that importing socialmeter stays fast.
+
+# Stored in a Record in place of a value that has been released.
+_RELEASED = object()
+
+
+class Record:
+    """
+    The Record class holds a single piece of data as it is passed
+    through the chain. It is a lightweight replacement for a pandas
+    Series and supports the same item access that modules use
+    (data[key], data[key] = value, "key" in data, data.keys()).
+
+    Values are stored in a list that is indexed by the position of
+    each column in column_format. The index is precomputed by the
+    SMeter whenever the column format changes and is shared by every
+    record, so creating a record only allocates the list of values.
+
+    Keys that are not in the column format are kept in a separate
+    dictionary that is only created when it is needed.
+
+    Each record also carries the TextAnalysis of its text (see
+    analysis()), which is shared by all the modules it passes through.
+
+    A column that is no longer needed can be dropped with release().
+    The record then behaves as if it never had the column.
+    """
+    __slots__ = ('_index', '_values', '_extra', '_analysis')
+
+    def __init__(self, index, values=None):
+        self._index = index
+        if values is None:
+            values = [None] * len(index)
+        self._values = values
+        self._extra = None
+        self._analysis = None
+
+    def __getitem__(self, key):
+        i = self._index.get(key)
+        if i is not None:
+            v = self._values[i]
+            if v is not _RELEASED:
+                return v
+            raise KeyError(key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        i = self._index.get(key)
+        if i is not None:
+            self._values[i] = value
+        else:
+            if self._extra is None:
+                self._extra = dict()
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        i = self._index.get(key)
+        if i is not None:
+            return self._values[i] is not _RELEASED
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return "Record({})".format(self.to_dict())
+
+    def analysis(self):
+        """
+        Returns the TextAnalysis for the text of this record. It is
+        created the first time it is requested and reused until the
+        text changes.
+        """
+        text = self.get("text")
+        if text is None and self._analysis is not None:
+            # The text has been released, keep its analysis
+            return self._analysis
+        if text is None:
+            text = ""
+        if self._analysis is None:
+            self._analysis = TextAnalysis(text)
+        elif self._analysis.text is not text:
+            self._analysis = TextAnalysis(text, self._analysis.tokenizer)
+        return self._analysis
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def release(self, key):
+        """
+        Drops the value of the column key, so the memory it holds can
+        be freed before the record reaches the end of the chain.
+        """
+        i = self._index.get(key)
+        if i is not None:
+            self._values[i] = _RELEASED
+        elif self._extra is not None:
+            self._extra.pop(key, None)
+
+    def keys(self):
+        values = self._values
+        keys = [k for k, i in self._index.items()
+                if values[i] is not _RELEASED]
+        if self._extra is not None:
+            keys.extend(self._extra.keys())
+        return keys
+
+    def set_tokenizer(self, tokenizer):
+        """
+        Sets the tokenizer of the record's TextAnalysis.
+        """
+        self._analysis = TextAnalysis(self.get("text", ""), tokenizer)
+
+    def to_dict(self):
+        d = dict()
+        for k, i in self._index.items():
+            v = self._values[i]
+            if v is not _RELEASED:
+                d[k] = v
+        if self._extra is not None:
+            d.update(self._extra)
+        return d
+
+    def to_series(self):
+        """
+        Converts the record to a pandas Series, for use at the
+        boundaries of the chain where pandas is wanted.
+        """
+        import pandas as pd
+        return pd.Series(data=self.to_dict(), index=self.keys(),
+                         dtype=object)
 
 
 class Module:
@@ -18,11 +166,26 @@ class Module:
     column_format : List(String)
     A list of strings of fields used in the DataFrame. This is also set by
     the Link object and should not be changed manually.
+
+    consumes : Tuple(String)
+    The columns that process reads, which the SMeter uses to release
+    columns no module reads any more. None (the default) means the
+    module may read any column.
     """
+    consumes = None
 
     def process(self, data):
         return data
 
+    def process_batch(self, datas):
+        """
+        Processes a list of data objects and returns the processed
+        list. By default this calls process on each object, subclasses
+        that can work on a whole batch at once (for example, a single
+        vectorized call) should override it.
+        """
+        return [self.process(d) for d in datas]
+
     def set_column_format(self, c_format):
         self.__column_format = c_format[:]
 
@@ -51,7 +214,8 @@ class InputModule(Module):
     needs to use all of that power on the thread handling and preparing
     the data, it may be adventageous to spawn a new thread (possibly
     from a pool of threads) for the data to be processed on so the API
-    thread can continue without being blocked.
+    thread can continue without being blocked. This is done by setting
+    an InputDispatcher on the SMeter with .set_dispatcher().
     """
     def process(self, data):
         return data
@@ -65,6 +229,9 @@ class PreprocessorExtractorModule(Module):
     general preprocessing operations using the PreprocessorExtractor
     class and it's subclasses.
     """
+    # The preprocessors read the text through the record's analysis
+    consumes = ("text",)
+
     def __init__(self, preprocessor):
         self.preprocess_extractor = preprocessor
         if hasattr(preprocessor, "key"):
@@ -76,16 +243,37 @@ class PreprocessorExtractorModule(Module):
         self.key = key
 
     def process(self, data):
-        if "text" in data.keys():
-            text = data["text"]
-            data[self.key] = self.preprocess_extractor.extract(text)
+        if "text" in data:
+            analysis = data.analysis()
+            data[self.key] = \
+                self.preprocess_extractor.extract_analysis(analysis)
         return super().process(data)
 
 
 class PreprocessorExtractor():
+    """
+    PreprocessorExtractor extracts preprocessed data from a text.
+
+    Members
+    -------
+    requires : Tuple(String)
+    The names of the TextAnalysis artifacts (see
+    socialmeter.analysis) that extract_analysis uses. The SMeter
+    only computes the artifacts that some extractor requires.
+    """
+    requires = ()
+
     def extract(self, text):
         return None
 
+    def extract_analysis(self, analysis):
+        """
+        Extracts from the TextAnalysis of a text. The default calls
+        extract with the text, subclasses that tokenize or tag the text
+        should override this to use the shared analysis.
+        """
+        return self.extract(analysis.text)
+
 
 class FeatureExtractorModule(Module):
     """
@@ -106,6 +294,8 @@ class FeatureExtractorModule(Module):
     The key in column_format that corresponds to this feature. This
     is used to set the correct property in the DataFrame.
     """
+    consumes = ("text",)
+
     def __init__(self, extractor_class):
         self.feature_extractor = extractor_class
         try:
@@ -125,9 +315,9 @@ class FeatureExtractorModule(Module):
         self.key = key
 
     def process(self, data):
-        if "text" in data.keys():
-            text = data["text"]
-            data[self.key] = self.feature_extractor.extract(text)
+        if "text" in data:
+            analysis = data.analysis()
+            data[self.key] = self.feature_extractor.extract_analysis(analysis)
         return super().process(data)
 
 
@@ -166,28 +356,156 @@ class FeatureExtractor():
 
     discrete_values : List
     The list of values to set corresponding to each format.
+
+    requires : Tuple(String)
+    The names of the TextAnalysis artifacts (see
+    socialmeter.analysis) that extract_analysis uses. The SMeter
+    only computes the artifacts that some extractor requires.
+
+    The formats are compiled into sorted bounds when they are set, so
+    discretizing a value is a binary search instead of parsing and
+    comparing every format. discretize_array discretizes a whole
+    array of values at once with numpy.
     """
+    requires = ()
+
     def __init__(self):
         self.discrete_format = None
         self.discrete_values = None
+        self._compiled_format = None
 
     def set_discrete_format(self, discrete_f, discrete_v):
         self.discrete_format = discrete_f
         self.discrete_values = discrete_v
+        self._compile_discrete_format()
 
     def extract(self, text):
         return None
 
+    def signature(self):
+        """
+        Returns a string identifying this extractor and its
+        configuration. Features extracted by extractors with the same
+        signature are interchangeable, which is what FeatureCache
+        relies on. Subclasses with more configuration (a lexicon, for
+        example) should add it to the signature.
+        """
+        return "{}.{}({}, {})".format(
+            type(self).__module__, type(self).__name__,
+            self.discrete_format, self.discrete_values)
+
+    def extract_analysis(self, analysis):
+        """
+        Extracts the feature from the TextAnalysis of a text. The
+        default calls extract with the text. Subclasses that tokenize
+        or POS tag the text should override this and use the tokens
+        and tags of the analysis, which are shared between extractors.
+        """
+        return self.extract(analysis.text)
+
     def discretize_result(self, result):
         if self.discrete_format is None:
             return result
+        if getattr(self, "_compiled_format", None) \
+           is not self.discrete_format:
+            self._compile_discrete_format()
+        if result != result:
+            # NaN does not fit in any format
+            return None
+
+        bounds = self._d_bounds
+        i = bisect_left(bounds, result)
+        if i < len(bounds) and bounds[i] == result:
+            return self._d_region_values[2 * i + 1]
+        return self._d_region_values[2 * i]
+
+    def discretize_array(self, results):
+        """
+        Discretizes an array of results in one call using numpy and
+        returns a numpy array of the discrete values. Values that do
+        not fit in any format are None, as with discretize_result.
+        """
+        import numpy as np
+        results = np.asarray(results, dtype=float)
+        if self.discrete_format is None:
+            return results
+        if getattr(self, "_compiled_format", None) \
+           is not self.discrete_format:
+            self._compile_discrete_format()
+        if self._d_bounds_array is None:
+            self._d_bounds_array = np.asarray(self._d_bounds, dtype=float)
+            if None in self._d_region_values:
+                self._d_region_array = np.asarray(self._d_region_values,
+                                                  dtype=object)
+            else:
+                self._d_region_array = np.asarray(self._d_region_values)
+
+        bounds = self._d_bounds_array
+        i = np.searchsorted(bounds, results, side='left')
+        if len(bounds) > 0:
+            nearest = bounds[np.minimum(i, len(bounds) - 1)]
+            regions = 2 * i + ((i < len(bounds)) & (nearest == results))
         else:
-            for f in self.discrete_format:
-                cmp_r = self._compare_discrete_f(f, result)
-                if cmp_r is not None:
-                    return self.discrete_values[
-                        self.discrete_format.index(cmp_r)]
-        return None
+            regions = i
+        discrete = self._d_region_array[regions]
+
+        nans = np.isnan(results)
+        if nans.any():
+            discrete = discrete.astype(object)
+            discrete[nans] = None
+        return discrete
+
+    def _compile_discrete_format(self):
+        """
+        Compiles discrete_format into sorted bounds and the value of
+        every region between them.
+
+        The bounds of all the formats split the number line into the
+        bounds themselves and the open intervals between them. Each
+        region is given the value of the first format it fits in, which
+        is what walking the formats in order would return, so a lookup
+        only has to find the region of a value.
+        """
+        self._compiled_format = self.discrete_format
+        if self.discrete_format is None:
+            return
+
+        bounds = set()
+        for f in self.discrete_format:
+            (t, v) = self._parse_d_format(f)
+            if t == "i" or t == "e":
+                bounds.update(v)
+            else:
+                bounds.add(v)
+        bounds = sorted(bounds)
+
+        # Pick a value inside every region. Region 2i is the interval
+        # below bounds[i] and region 2i + 1 is bounds[i] itself.
+        samples = list()
+        if len(bounds) == 0:
+            samples.append(0.0)
+        else:
+            samples.append(bounds[0] - 1.0)
+            for i in range(len(bounds)):
+                if i > 0:
+                    samples.append((bounds[i - 1] + bounds[i]) / 2.0)
+                samples.append(bounds[i])
+            samples.append(bounds[-1] + 1.0)
+
+        region_values = list()
+        for sample in samples:
+            value = None
+            for i, f in enumerate(self.discrete_format):
+                if self._compare_discrete_f(f, sample) is not None:
+                    value = self.discrete_values[i]
+                    break
+            region_values.append(value)
+
+        self._d_bounds = bounds
+        self._d_region_values = region_values
+        # Built by discretize_array when it is first used
+        self._d_bounds_array = None
+        self._d_region_array = None
 
     def _compare_discrete_f(self, d_f, cmp_v):
         """
@@ -265,11 +583,18 @@ class Link:
     The Link class binds modules of a single type together. It is
     responsible for managing the modules and that the data is passed
     in the correct order.
+
+    If stats is set to a ChainStats object, the time spent in each
+    module is recorded under "<name>/<module key>", and if profiler is
+    set to a StageProfiler the modules are profiled under that name.
     """
-    def __init__(self, owner):
+    def __init__(self, owner, name="link"):
         self.owner = owner
+        self.name = name
         self.mods = list()
         self.column_format = None
+        self.stats = None
+        self.profiler = None
 
     def __str__(self):
         s = "<{}>\n".format(hex(id(self)))
@@ -284,10 +609,44 @@ class Link:
 
     def process(self, data):
         # For each module in this chain, process it
+        if self.stats is None and self.profiler is None:
+            for m in self.mods:
+                data = m.process(data)
+            return data
+
         for m in self.mods:
-            data = m.process(data)
+            data = self.measure(m, m.process, data, 1)
         return data
 
+    def process_batch(self, datas):
+        # Each module gets the whole batch before the next one runs
+        if self.stats is None and self.profiler is None:
+            for m in self.mods:
+                datas = m.process_batch(datas)
+            return datas
+
+        for m in self.mods:
+            datas = self.measure(m, m.process_batch, datas, len(datas))
+        return datas
+
+    def measure(self, mod, process, data, n):
+        name = self.mod_name(mod)
+        if self.profiler is not None:
+            process = self.profiler.wrap(name, process, n)
+        if self.stats is None:
+            return process(data)
+        return self.stats.measure(name, process, data, n)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["stats"] = None
+        state["profiler"] = None
+        return state
+
+    def mod_name(self, mod):
+        return "{}/{}".format(self.name, getattr(mod, "key",
+                                                 type(mod).__name__))
+
     def set_column_format(self, c_format):
         self.column_format = c_format[:]
         for m in self.mods:
@@ -298,8 +657,8 @@ class Link:
 
 
 class PreprocessorLink(Link):
-    def __init__(self, owner):
-        super().__init__(owner)
+    def __init__(self, owner, name="preprocess"):
+        super().__init__(owner, name)
 
     def process(self, data):
         return super().process(data)
@@ -317,18 +676,126 @@ class SMeter:
     the Chain class, specifically in how the individual modules are
     handled vs the links of modules. This was changed because it allows
     for more specific handling with the checking code.
+
+    Members
+    -------
+    n_workers : Int
+    The number of processes used by extract_features, and so by train,
+    k-fold tests and grid searches. Set with .set_parallelism().
+
+    chunk_size : Int
+    The number of texts sent to a worker process at a time.
+
+    dispatcher : InputDispatcher
+    If set, the input module hands its data to the dispatcher's worker
+    threads instead of running the chain on its own thread.
+
+    feature_cache : FeatureCache
+    If set, feature vectors are looked up in the cache before they are
+    extracted. Set with .set_feature_cache().
+
+    feature_store : FeatureStore
+    If set, extract_features memory-maps the feature matrix of corpora
+    it has extracted before. Set with .set_feature_store().
+
+    stats : ChainStats
+    The timing and throughput stats of each stage and module, collected
+    while enabled with .enable_stats(). None when disabled.
+
+    plan : ExtractionPlan
+    The TextAnalysis artifacts needed by the extractors of the chain.
+    It is built by .extraction_plan() when the meter starts.
+
+    micro_batcher : MicroBatcher
+    If set, records are classified in small batches instead of one at
+    a time. Set with .set_micro_batcher().
+
+    profiler : StageProfiler
+    Profiles the stages and modules with cProfile and tracemalloc
+    while enabled with .enable_profiling(). None when disabled.
+
+    output_columns : List(String)
+    If set, only these columns reach the output module, and every other
+    column is released as soon as the last module that reads it has run
+    (see Module.consumes). Set with .set_output_columns().
+
+    released : Dict(String, List(String))
+    The columns released after each stage ("input" being the columns
+    that no module reads), computed from output_columns by
+    .set_classifier_keys().
+
+    tokenizer : Object
+    The tokenizer used for the "tokens" artifact of the chain's texts,
+    or None for the default tokenizer of the process (see
+    socialmeter.tokenizers). Set with .set_tokenizer().
+
+    dedup_index : NearDuplicateIndex
+    If set, a streamed record whose text is a near duplicate of a
+    recent one reuses its features and classification instead of
+    running the preprocess, preclass and classify stages. Set with
+    .set_dedup_index().
+
+    A trained meter can be saved with .save() and loaded with
+    SMeter.load(). The input and output modules, handler, dispatcher,
+    stats, feature cache and feature store are not saved, since they
+    hold connections, threads and files; set them again after loading.
     """
     def __init__(self):
         self.input_mod = None
         self.preprocess_link = PreprocessorLink(self)
-        self.preclass_link = Link(self)
+        self.preclass_link = Link(self, "preclass")
         self.class_mod = None
         self.output_mod = None
 
         self.column_format = ['classification']
+        self.record_index = {'classification': 0}
         self.handler = None
         self.name = None
 
+        self.n_workers = 1
+        self.chunk_size = 1000
+        self.dispatcher = None
+        self.feature_cache = None
+        self.feature_store = None
+        self._feature_signature = None
+        self.stats = None
+        self.plan = None
+        self.micro_batcher = None
+        self.dedup_index = None
+        self.profiler = None
+        self.output_columns = None
+        self.released = None
+        self.tokenizer = None
+
+    # Members that are not saved by save(), see __getstate__
+    _unsaved = ("input_mod", "output_mod", "handler", "dispatcher",
+                "stats", "feature_cache", "feature_store", "plan",
+                "micro_batcher", "dedup_index", "profiler")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for k in SMeter._unsaved:
+            state[k] = None
+        return state
+
+    def save(self, filename):
+        """
+        Saves the meter, including its trained classifier and the
+        configuration of its preprocess and preclass modules, to the
+        file `filename`.
+        """
+        with open(filename, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(filename):
+        """
+        Loads a meter saved with save(). The meter is ready to classify
+        once its input and output modules have been set.
+        """
+        with open(filename, 'rb') as f:
+            return pickle.load(f)
+
     def train(self, training_data):
         texts = training_data[0]
         sentiments = training_data[1]
@@ -337,36 +804,307 @@ class SMeter:
         self.class_mod.train((features, sentiments))
 
     def extract_features(self, texts):
+        """
+        Extracts the features of every text and returns them in the
+        same order. If n_workers is more than 1 and there is more than
+        one chunk of texts, the extraction is done on a process pool.
+
+        If a feature cache is set, only the texts that are not in the
+        cache are extracted, and each of them only once.
+
+        If a feature store is set, the features are memory-mapped from
+        the store when this corpus has been extracted before, and saved
+        to it otherwise.
+
+        If an extractor returns sparse rows (see HashedNGramFE), the
+        features are returned as a scipy.sparse matrix.
+        """
+        features = self.run_stage("extract", self._extract_stored_features,
+                                  texts, len(texts))
+        return sparse.feature_matrix(features)
+
+    def _extract_stored_features(self, texts):
+        if self.feature_store is not None:
+            keys = [m.key for m in self.preclass_link.mods]
+            return self.feature_store.features_for(
+                self.feature_signature(), keys, texts,
+                self._extract_cached_features)
+        return self._extract_cached_features(texts)
+
+    def _extract_cached_features(self, texts):
+        if self.feature_cache is None:
+            return self._extract_features(texts)
+
+        cache = self.feature_cache
+        signature = self.feature_signature()
+        keys = [cache.key_for(signature, t) for t in texts]
+        features = [cache.get(k) for k in keys]
+
+        missing = dict()
+        for i in range(len(features)):
+            if features[i] is None and keys[i] not in missing:
+                missing[keys[i]] = texts[i]
+        extracted = dict(zip(missing.keys(),
+                             self._extract_features(list(missing.values()))))
+        for k, f in extracted.items():
+            cache.put(k, f)
+        cache.flush()
+
+        for i in range(len(features)):
+            if features[i] is None:
+                features[i] = list(extracted[keys[i]])
+        return features
+
+    def _extract_features(self, texts):
+        from socialmeter import parallel
+        extractors = [m.feature_extractor for m in self.preclass_link.mods]
+        artifacts = ExtractionPlan(extractors).artifacts
+
+        if self.n_workers != 1 and len(texts) > self.chunk_size:
+            return parallel.extract_parallel(extractors, texts,
+                                             self.n_workers,
+                                             self.chunk_size, artifacts,
+                                             self.tokenizer)
+
         features = list()
-        for t in texts:
-            f = self.extract_single_features(t)
-            features.append(f)
+        for i in range(0, len(texts), self.chunk_size):
+            features.extend(parallel.extract_chunk(
+                extractors, texts[i:i + self.chunk_size], artifacts,
+                self.tokenizer))
         return features
 
     def extract_single_features(self, text):
+        if self.feature_cache is None:
+            return self._extract_single_features(text)
+
+        key = self.feature_cache.key_for(self.feature_signature(), text)
+        f = self.feature_cache.get(key)
+        if f is None:
+            f = self._extract_single_features(text)
+            self.feature_cache.put(key, f)
+        return f
+
+    def _extract_single_features(self, text):
+        analysis = TextAnalysis(text, self.tokenizer)
         f = list()
         for mod in self.preclass_link.mods:
-            f.append(mod.feature_extractor.extract(text))
+            f.append(mod.feature_extractor.extract_analysis(analysis))
         return f
 
+    def classify_many(self, texts):
+        """
+        Classifies a list of texts with a single call to the classifier
+        and returns the list of classifications.
+        """
+        features = self.extract_features(texts)
+        return self.class_mod.classify(features)
+
+    def process_batch(self, input_datas):
+        """
+        Runs a batch of inputs through the chain and returns the list
+        of results from the output module.
+
+        input_datas should be a list of dictionaries (as in new_input)
+        or a pandas DataFrame with one row per input. Every module
+        receives the whole batch through process_batch, so the
+        classifier module makes one predict call per batch.
+        """
+        pd = sys.modules.get("pandas")
+        if pd is not None and isinstance(input_datas, pd.DataFrame):
+            input_datas = input_datas.to_dict('records')
+        self.set_classifier_keys()
+        self.extraction_plan()
+
+        n = len(input_datas)
+        datas = [self.format_input(d) for d in input_datas]
+        self.analyze_batch(datas)
+        datas = self.run_stage("preprocess",
+                               self.preprocess_link.process_batch, datas, n)
+        datas = self.run_stage("preclass",
+                               self.preclass_link.process_batch, datas, n)
+        datas = self.run_stage("classify",
+                               self.class_mod.process_batch, datas, n)
+        return self.run_stage("output",
+                              self.output_mod.process_batch, datas, n)
+
+    def analyze_batch(self, datas):
+        """
+        Computes the artifacts of a list of records that are faster to
+        compute for many texts at once, which is the POS tags if the
+        extraction plan needs them.
+        """
+        if self.extraction_plan().needs("pos_tags"):
+            from socialmeter import tagger
+            tagger.tag_analyses([d.analysis() for d in datas
+                                 if "text" in d])
+
+    def run_stage(self, name, process, data, n=1):
+        """
+        Calls process(data) and returns the result, recording the time
+        it took under name if stats are enabled and profiling it if
+        profiling is enabled. n is the number of records in data.
+        """
+        if self.profiler is not None:
+            process = self.profiler.wrap(name, process, n)
+        if self.stats is None:
+            data = process(data)
+        else:
+            data = self.stats.measure(name, process, data, n)
+
+        if self.released is not None and name in self.released:
+            self.release_columns(data, self.released[name])
+        return data
+
+    def release_columns(self, data, columns):
+        """
+        Releases columns from data, which is a Record or a list of them.
+        """
+        if isinstance(data, Record):
+            data = (data,)
+        for d in data:
+            for k in columns:
+                d.release(k)
+
+    def set_classifier_keys(self):
+        # Make sure that we've set the classifier's keys
+        keys = list()
+        for m in self.preclass_link.mods:
+            keys.append(m.key)
+        self.class_mod.set_keys(keys)
+        self.released = self.column_releases()
+
+    def column_releases(self):
+        """
+        Returns a dict of the columns to release after each stage
+        ("input", "preprocess", "preclass" and "classify"), or None if
+        no output columns are set. A column is released after the last
+        stage with a module that reads it, or after the stage that sets
+        it, unless it is an output column.
+        """
+        if self.output_columns is None:
+            return None
+
+        stages = [("preprocess", self.preprocess_link.mods),
+                  ("preclass", self.preclass_link.mods),
+                  ("classify", [self.class_mod])]
+        last = dict()
+        for i, (_, mods) in enumerate(stages):
+            for m in mods:
+                consumes = getattr(m, "consumes", None)
+                if consumes is None:
+                    consumes = self.column_format
+                for k in consumes:
+                    last[k] = i
+        for i, (_, mods) in enumerate(stages[:2]):
+            for m in mods:
+                last[m.key] = max(last.get(m.key, -1), i)
+        last["classification"] = 2
+
+        # Modules may set keys that are not in the column format
+        columns = list(self.column_format)
+        for k in last.keys():
+            if k not in columns:
+                columns.append(k)
+
+        released = {"input": [], "preprocess": [], "preclass": [],
+                    "classify": []}
+        for k in columns:
+            if k in self.output_columns:
+                continue
+            i = last.get(k, -1)
+            if i == -1:
+                released["input"].append(k)
+            else:
+                released[stages[i][0]].append(k)
+        return released
+
+    def extraction_plan(self):
+        """
+        Returns the ExtractionPlan of the extractors in the preprocess
+        and preclass links, building it if the links have changed. This
+        raises a ValueError if an extractor requires an unknown
+        artifact.
+        """
+        if self.plan is None:
+            extractors = list()
+            for m in self.preprocess_link.mods:
+                if hasattr(m, "preprocess_extractor"):
+                    extractors.append(m.preprocess_extractor)
+            for m in self.preclass_link.mods:
+                if hasattr(m, "feature_extractor"):
+                    extractors.append(m.feature_extractor)
+            self.plan = ExtractionPlan(extractors)
+        return self.plan
+
+    def is_ready(self):
+        return self.input_mod is not None\
+           and not self.preprocess_link.is_empty()\
+           and not self.preclass_link.is_empty()\
+           and self.class_mod is not None\
+           and self.output_mod is not None
+
     def start_if_ready(self):
         # TODO: Change this into checking if they're empty one by
         # one and printing which are not set, and then the else case
         # is starting the input module.
-        if self.input_mod is not None\
-           and not self.preprocess_link.is_empty()\
-           and not self.preclass_link.is_empty()\
-           and self.class_mod is not None\
-           and self.output_mod is not None:
-            # Make sure that we've set the classifier's keys
-            keys = list()
-            for m in self.preclass_link.mods:
-                keys.append(m.key)
-            self.class_mod.set_keys(keys)
+        if self.is_ready():
+            self.set_classifier_keys()
+            self.extraction_plan()
+            if self.micro_batcher is not None:
+                self.micro_batcher.start(self)
+            if self.dispatcher is not None:
+                self.dispatcher.start(self.new_input)
+
             self.input_mod.start()
+
+            # The input module has finished, finish the inputs that
+            # are still queued or waiting for a batch.
+            if self.dispatcher is not None:
+                self.dispatcher.stop()
+            if self.micro_batcher is not None:
+                self.micro_batcher.stop()
+        else:
+            print("Not ready to start.")
+
+    def start_async_if_ready(self, queue_size=100, executor=None):
+        """
+        Starts the meter like start_if_ready, but runs the stages as an
+        asyncio pipeline with bounded queues between them (see
+        AsyncPipeline). Returns the AsyncPipeline once the input module
+        has finished and every record has been output.
+        """
+        import asyncio
+        from socialmeter.pipeline import AsyncPipeline
+
+        if self.is_ready():
+            self.set_classifier_keys()
+            self.extraction_plan()
+            pipeline = AsyncPipeline(self, queue_size, executor)
+            # A loop of its own rather than asyncio.run, which needs
+            # Python 3.7
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(pipeline.run(loop))
+            finally:
+                loop.close()
+            return pipeline
         else:
             print("Not ready to start.")
 
+    def start_sharded_if_ready(self, n_workers=None, batch_size=64,
+                               ordered=True):
+        """
+        Starts the meter like start_if_ready, but runs the chain on
+        n_workers forked processes (see ShardedServer). Returns the
+        server once the input module has finished and every record has
+        been output, so its stats can be read.
+        """
+        from socialmeter.serving import ShardedServer
+
+        server = ShardedServer(self, n_workers, batch_size, ordered)
+        server.start()
+        return server
+
     #  Module finished handlers
     def new_input(self, input_data):
         """
@@ -379,42 +1117,123 @@ class SMeter:
         It is the responsibility of this method to use column_format
         to set which properties are important enough to
         be used and which will be not. It is also responsible for fitting
-        the object into a pandas Series object.
-        """
-        # Format the input_data to only fit column_format, and then
-        # convert it to a pandas Series object
-        formatted = dict()
-        for k in self.column_format:
-            if k in input_data.keys():
-                formatted[k] = input_data[k]
-        if 'text' not in formatted.keys():
-            formatted['text'] = ""
-        series = pd.Series(data=formatted, index=self.column_format,
-                           dtype=object)
-
-        # Feed the Series through the preprocessor link
-        data = self.preprocess_link.process(series)
+        the object into a Record object.
+        """
+        record = self.format_input(input_data)
+
+        if self.dedup_index is not None and \
+           self.run_stage("dedup", self.reuse_duplicate, record):
+            if self.released is not None:
+                self.release_columns(record, self.released["preprocess"] +
+                                     self.released["preclass"] +
+                                     self.released["classify"])
+            self.finished_classify(record)
+            return
+
+        # Feed the Record through the preprocessor link
+        data = self.run_stage("preprocess", self.preprocess_link.process,
+                              record)
         self.preprocess_finished(data)
 
+    def format_input(self, input_data):
+        """
+        Formats the input_data dictionary to only fit column_format,
+        and then converts it to a Record object.
+        """
+        values = [None] * len(self.column_format)
+        for k, i in self.record_index.items():
+            if k in input_data:
+                values[i] = input_data[k]
+        record = Record(self.record_index, values)
+        if 'text' in self.record_index and record['text'] is None:
+            record['text'] = ""
+        if self.tokenizer is not None:
+            record.set_tokenizer(self.tokenizer)
+        if self.released is not None:
+            self.release_columns(record, self.released["input"])
+        return record
+
+    def reuse_duplicate(self, data):
+        """
+        Looks the text of data up in the dedup index. If it is a near
+        duplicate of a recent text, sets the features and
+        classification of data to those of that text and returns True.
+        The signature is kept in the record's TextAnalysis, so that
+        finished_classify can add the record to the index otherwise.
+        """
+        if "text" not in data:
+            return False
+        analysis = data.analysis()
+        signature = self.dedup_index.signature(data["text"])
+        analysis.set("minhash", signature)
+
+        values = self.dedup_index.lookup(signature)
+        if values is None:
+            return False
+        for k, v in values.items():
+            data[k] = v
+        analysis.set("duplicate", True)
+        return True
+
+    def remember_duplicate(self, data):
+        """
+        Adds the features and classification of data to the dedup
+        index, unless they were reused from it.
+        """
+        artifacts = data.analysis().artifacts
+        signature = artifacts.get("minhash")
+        if signature is None or artifacts.get("duplicate"):
+            return
+        keys = [m.key for m in self.preclass_link.mods]
+        keys.append("classification")
+        self.dedup_index.add(signature, {k: data.get(k) for k in keys})
+
     def preprocess_finished(self, data):
         """
         Called when the preprocessing modules have all finished.
         """
-        data = self.preclass_link.process(data)
+        data = self.run_stage("preclass", self.preclass_process, data)
         self.preclass_finished(data)
 
+    def preclass_process(self, data):
+        """
+        Runs the preclass link on data. If there is a feature cache, the
+        features are set from the cache instead when they are cached.
+        """
+        if self.feature_cache is None or "text" not in data:
+            return self.preclass_link.process(data)
+
+        key = self.feature_cache.key_for(self.feature_signature(),
+                                         data["text"])
+        features = self.feature_cache.get(key)
+        if features is None:
+            data = self.preclass_link.process(data)
+            self.feature_cache.put(
+                key, [data[m.key] for m in self.preclass_link.mods])
+        else:
+            for m, f in zip(self.preclass_link.mods, features):
+                data[m.key] = f
+        return data
+
     def preclass_finished(self, data):
         """
         Called when the preclass modules have all finished.
         """
-        data = self.class_mod.process(data)
+        if self.micro_batcher is not None:
+            # The micro-batcher calls finished_classify once the batch
+            # has been classified.
+            self.micro_batcher.submit(data)
+            return
+        data = self.run_stage("classify", self.class_mod.process, data)
         self.finished_classify(data)
 
     def finished_classify(self, data):
         """
         Called when the classifier is done classifying the data.
         """
-        data = self.output_mod.process(data)
+        if self.dedup_index is not None:
+            self.remember_duplicate(data)
+        data = self.run_stage("output", self.output_mod.process, data)
         self.output_finished(data)
 
     def output_finished(self, data):
@@ -442,8 +1261,117 @@ class SMeter:
     def set_handler(self, handler):
         self.handler = handler
 
+    def set_parallelism(self, n_workers, chunk_size=None):
+        """
+        Sets the number of worker processes used to extract features.
+        A n_workers of None uses one process per core.
+        """
+        if n_workers is None:
+            n_workers = os.cpu_count()
+        self.n_workers = n_workers
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+
+    def enable_stats(self, window=1000, log_interval=None):
+        """
+        Starts collecting the time spent in each stage and module. The
+        percentiles are computed over the last `window` calls and, if
+        log_interval is set, the stats are logged to the
+        socialmeter.stats logger every log_interval seconds.
+        """
+        self.stats = ChainStats(window, log_interval)
+        self.preprocess_link.stats = self.stats
+        self.preclass_link.stats = self.stats
+
+    def disable_stats(self):
+        self.stats = None
+        self.preprocess_link.stats = None
+        self.preclass_link.stats = None
+
+    def stats_snapshot(self):
+        """
+        Returns a dict of the stats of every stage and module (see
+        TimingStats.snapshot), or None if stats are not enabled.
+        """
+        if self.stats is None:
+            return None
+        return self.stats.snapshot()
+
+    def enable_profiling(self, stages=None, max_records=1000, cpu=True,
+                         memory=False, directory="profiles"):
+        """
+        Starts profiling the first max_records records of each stage
+        (for example "extract", "preclass" or "classify") and module
+        (for example "preclass/word-count") in stages, or of every one
+        if stages is None. cpu profiles them with cProfile and memory
+        records their allocations with tracemalloc. The reports are
+        written to directory by .disable_profiling().
+        """
+        from socialmeter.profiling import StageProfiler
+
+        self.profiler = StageProfiler(stages, max_records, cpu, memory,
+                                      directory)
+        self.preprocess_link.profiler = self.profiler
+        self.preclass_link.profiler = self.profiler
+
+    def disable_profiling(self):
+        """
+        Stops profiling, writes the .prof and allocation reports and
+        returns the names of the files written.
+        """
+        if self.profiler is None:
+            return list()
+        files = self.profiler.dump()
+        self.profiler.stop()
+        self.profiler = None
+        self.preprocess_link.profiler = None
+        self.preclass_link.profiler = None
+        return files
+
+    def set_feature_cache(self, cache):
+        """
+        Sets the FeatureCache used to look up feature vectors. None
+        removes it.
+        """
+        self.feature_cache = cache
+        self._feature_signature = None
+
+    def set_feature_store(self, store):
+        """
+        Sets the FeatureStore used by extract_features (and so by train,
+        k-fold tests and grid searches). None removes it.
+        """
+        self.feature_store = store
+
+    def feature_signature(self):
+        """
+        Returns a string that identifies the tokenizer and the feature
+        extractors of the preclass link and their configuration, used
+        to key cached features. The part of the extractors is computed
+        once and reset when a preclass module is added; the tokenizer
+        is looked up every time, since the default tokenizer of the
+        process can change.
+        """
+        from socialmeter import tokenizers
+
+        if self._feature_signature is None:
+            parts = list()
+            for m in self.preclass_link.mods:
+                parts.append("{}={}".format(
+                    m.key, m.feature_extractor.signature()))
+            self._feature_signature = ";".join(parts)
+
+        tokenizer = self.tokenizer
+        if tokenizer is None:
+            tokenizer = tokenizers.get_tokenizer()
+        return "tokenizer={};{}".format(tokenizer.name,
+                                        self._feature_signature)
+
     def set_column_format(self, c_format):
         self.column_format = c_format
+        self.record_index = dict()
+        for i, k in enumerate(c_format):
+            self.record_index[k] = i
 
         if self.input_mod is not None:
             self.input_mod.set_column_format(c_format)
@@ -461,19 +1389,76 @@ class SMeter:
     def set_input_mod(self, input_mod):
         self.input_mod = input_mod
         self.input_mod.set_column_format(self.column_format)
-        self.input_mod.set_handler(self.new_input)
+        if self.dispatcher is not None:
+            self.input_mod.set_handler(self.dispatcher.submit)
+        else:
+            self.input_mod.set_handler(self.new_input)
+
+    def set_tokenizer(self, tokenizer):
+        """
+        Sets the tokenizer used by every module of the chain. tokenizer
+        is a tokenizer object, the name of one in
+        socialmeter.tokenizers.TOKENIZERS ("nltk" or "regex"), or None
+        for the default tokenizer of the process.
+        """
+        from socialmeter import tokenizers
+
+        if tokenizer is not None:
+            tokenizer = tokenizers.tokenizer_for(tokenizer)
+        self.tokenizer = tokenizer
+        self._feature_signature = None
+
+    def set_output_columns(self, columns):
+        """
+        Sets the columns that reach the output module. Every other
+        column is released once no module reads it any more, which
+        keeps the records small while they are queued or batched.
+        None (the default) passes every column to the output module.
+        """
+        self.output_columns = columns
+        # Computed by set_classifier_keys when the meter starts
+        self.released = None
+
+    def set_micro_batcher(self, batcher):
+        """
+        Sets the MicroBatcher that classifies records in small batches
+        when the meter is started with start_if_ready. None removes it.
+        """
+        self.micro_batcher = batcher
+
+    def set_dedup_index(self, index):
+        """
+        Sets the NearDuplicateIndex used to reuse the classification of
+        near duplicate texts. None removes it.
+        """
+        self.dedup_index = index
+
+    def set_dispatcher(self, dispatcher):
+        """
+        Sets the InputDispatcher that runs the chain for the input
+        module's data on a pool of threads. None removes it.
+        """
+        self.dispatcher = dispatcher
+        if self.input_mod is not None:
+            self.set_input_mod(self.input_mod)
 
     def add_preprocess_mod(self, pp_mod):
+        self.plan = None
+        self.released = None
         self.preprocess_link.add_mod(pp_mod)
         pp_mod.set_column_format(self.column_format)
         self.add_column(pp_mod.key)
 
     def add_preclass_mod(self, pc_mod):
+        self.plan = None
+        self.released = None
+        self._feature_signature = None
         self.preclass_link.add_mod(pc_mod)
         pc_mod.set_column_format(self.column_format)
         self.add_column(pc_mod.key)
 
     def set_class_mod(self, c_mod):
+        self.released = None
         c_mod.set_column_format(self.column_format)
         self.class_mod = c_mod
 
@@ -1,13 +1,23 @@
 # classif.__init__.py
+#
+# The classifier modules are imported when they are first used, so that
+# importing this package does not import sklearn.
 
-from .adaboost import AdaBoostModule
-from .decision_tree import DecisionTreeModule
-from .gaussian_process import GaussianProcessModule
-from .kneighbors import KNeighborsModule
-from .linear_svc import LinearSVCModule
-from .multinomial_nb import MultinomialNBModule
-from .nbclassifier import NBClassifierModule
-from .neural_net import MLPModule
-from .nu_svc import NuSVCModule
-from .radius_neighbors import RadiusNeighborsModule
-from .svc import SVCModule
+from ..lazy import lazy_module
+
+_exports = {
+    "AdaBoostModule": ".adaboost",
+    "DecisionTreeModule": ".decision_tree",
+    "GaussianProcessModule": ".gaussian_process",
+    "KNeighborsModule": ".kneighbors",
+    "LinearSVCModule": ".linear_svc",
+    "MultinomialNBModule": ".multinomial_nb",
+    "NBClassifierModule": ".nbclassifier",
+    "MLPModule": ".neural_net",
+    "NuSVCModule": ".nu_svc",
+    "RadiusNeighborsModule": ".radius_neighbors",
+    "SVCModule": ".svc",
+}
+
+__all__ = list(_exports.keys())
+lazy_module(globals(), _exports)
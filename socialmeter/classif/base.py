@@ -9,6 +9,7 @@
 # provides some convenience functionality.
 
 from ..chain_links import Module
+from ..sparse import feature_matrix
 
 
 class ClassifierModule(Module):
@@ -30,9 +31,21 @@ class ClassifierModule(Module):
         """
         pass
 
+    def classify(self, features):
+        """
+        Classifies a list of feature vectors and returns the list
+        of classifications.
+        """
+        return None
+
     def set_keys(self, keys):
         self.keys = keys
 
+    @property
+    def consumes(self):
+        # The classifier reads the feature columns
+        return tuple(self.keys)
+
     def features_for_data(self, data):
         features_dict = dict()
         for key in self.keys:
@@ -48,6 +61,10 @@ class SKLearnClassifierModule(ClassifierModule):
     """
     SKLearnClassifierModule defines some common functionality
     for sklearn's classifiers.
+
+    Rows of features that have sparse rows in them (see
+    socialmeter.sparse) are given to the classifier as a
+    scipy.sparse matrix, which MultinomialNB and LinearSVC accept.
     """
     def __init__(self):
         super().__init__()
@@ -65,10 +82,26 @@ class SKLearnClassifierModule(ClassifierModule):
         the __init__ method.
         """
         super().train(training_data)
-        self.classifier.fit(training_data[0], training_data[1])
+        self.classifier.fit(feature_matrix(training_data[0]),
+                            training_data[1])
+
+    def classify(self, features):
+        return self.classifier.predict(feature_matrix(features))
 
     def process(self, data):
         features = self.features_for_data(data)
-        p = self.classifier.predict([features])
-        data["classification"] = p
+        p = self.classify([features])
+        data["classification"] = p[0]
         return super().process(data)
+
+    def process_batch(self, datas):
+        """
+        Classifies the whole batch with a single call to predict.
+        """
+        if len(datas) == 0:
+            return datas
+        features = [self.features_for_data(d) for d in datas]
+        predictions = self.classify(features)
+        for d, p in zip(datas, predictions):
+            d["classification"] = p
+        return datas
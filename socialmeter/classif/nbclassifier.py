@@ -21,7 +21,15 @@ class NBClassifierModule(Module):
             self.keys.append(mod.key)
         self.classifier.fit(features, classifications)
 
-    def process(self, data):
+    def set_keys(self, keys):
+        self.keys = keys
+
+    @property
+    def consumes(self):
+        # The classifier reads the feature columns
+        return tuple(self.keys)
+
+    def features_for_data(self, data):
         # Format the features so we can classify them
         features_dict = dict()
         for key in self.keys:
@@ -30,9 +38,26 @@ class NBClassifierModule(Module):
         features = list()
         for v in features_dict.values():
             features.append(v)
-        p = self.classifier.predict([features])
-        if p == '0':
-            data["classification"] = "negative"
-        else:
-            data["classification"] = "positive"
+        return features
+
+    def classify(self, features):
+        classifications = list()
+        for p in self.classifier.predict(features):
+            if p == '0':
+                classifications.append("negative")
+            else:
+                classifications.append("positive")
+        return classifications
+
+    def process(self, data):
+        features = self.features_for_data(data)
+        data["classification"] = self.classify([features])[0]
         return super().process(data)
+
+    def process_batch(self, datas):
+        if len(datas) == 0:
+            return datas
+        features = [self.features_for_data(d) for d in datas]
+        for d, c in zip(datas, self.classify(features)):
+            d["classification"] = c
+        return datas
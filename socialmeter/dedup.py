@@ -0,0 +1,180 @@
+# dedup.py
+#
+# This file defines the near-duplicate index that the SMeter can use
+# to reuse the classification of texts it has recently seen.
+
+from collections import OrderedDict
+import re
+import sys
+import threading
+import zlib
+
+RETWEET_REGEX = re.compile(r'^(rt\s+@\w+:?\s*)+')
+URL_REGEX = re.compile(r'(https?://|www\.)\S+')
+SPACE_REGEX = re.compile(r'\s+')
+
+# The prime of the universal hash functions used for MinHash
+_PRIME = (1 << 31) - 1
+
+
+def normalize(text):
+    """
+    Normalizes a text for near-duplicate detection: it is lower cased,
+    retweet prefixes ("RT @user: ") and URLs are removed and runs of
+    whitespace are collapsed.
+    """
+    text = text.lower().strip()
+    text = RETWEET_REGEX.sub('', text)
+    text = URL_REGEX.sub('', text)
+    return SPACE_REGEX.sub(' ', text).strip()
+
+
+class NearDuplicateIndex:
+    """
+    NearDuplicateIndex remembers the results of the most recent texts
+    by their MinHash signature, and finds the results of a text whose
+    normalized words are nearly the same as a remembered text.
+
+    The signature is num_perm MinHash values of the word shingles of
+    the normalized text. It is split into bands, and texts with an
+    equal band are candidates; a candidate is a duplicate if the share
+    of equal MinHash values (an estimate of the Jaccard similarity of
+    the shingles) is at least threshold.
+
+    Members
+    -------
+    num_perm : Int
+    The number of MinHash values in a signature.
+
+    bands : Int
+    The number of LSH bands, which must divide num_perm. More bands
+    find less similar candidates.
+
+    threshold : Float
+    The estimated similarity at which a text is a duplicate.
+
+    max_entries : Int
+    The number of recent texts that are remembered.
+
+    shingle_size : Int
+    The number of words in each shingle.
+    """
+    def __init__(self, num_perm=64, bands=16, threshold=0.8,
+                 max_entries=10000, shingle_size=3, seed=1):
+        import numpy as np
+
+        if num_perm % bands != 0:
+            raise ValueError("bands must divide num_perm.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, num_perm).astype(np.uint64)
+        self._b = rng.randint(0, _PRIME, num_perm).astype(np.uint64)
+
+        self.entries = OrderedDict()
+        self.buckets = [dict() for _ in range(bands)]
+        self.next_id = 0
+        self.lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+
+    def shingles(self, text):
+        words = normalize(text).split(' ')
+        n = self.shingle_size
+        if len(words) <= n:
+            return [' '.join(words)]
+        return [' '.join(words[i:i + n]) for i in range(len(words) - n + 1)]
+
+    def signature(self, text):
+        """
+        Returns the MinHash signature of text as a numpy array.
+        """
+        import numpy as np
+
+        hashes = np.array([zlib.crc32(s.encode('utf-8'))
+                           for s in set(self.shingles(text))],
+                          dtype=np.uint64)
+        values = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return values.min(axis=1)
+
+    def _band_keys(self, signature):
+        r = self.rows
+        return [signature[i * r:(i + 1) * r].tobytes()
+                for i in range(self.bands)]
+
+    def lookup(self, signature):
+        """
+        Returns the value remembered for the most similar duplicate of
+        signature, or None if there is none.
+        """
+        with self.lock:
+            self.lookups += 1
+            candidates = set()
+            for bucket, key in zip(self.buckets,
+                                   self._band_keys(signature)):
+                entry_id = bucket.get(key)
+                if entry_id is not None:
+                    candidates.add(entry_id)
+
+            best, best_value = self.threshold, None
+            for entry_id in candidates:
+                other, _, value = self.entries[entry_id]
+                similarity = (other == signature).mean()
+                if similarity >= best:
+                    best, best_value = similarity, value
+            if best_value is not None:
+                self.hits += 1
+            return best_value
+
+    def add(self, signature, value):
+        """
+        Remembers value for signature, forgetting the oldest text if
+        there are max_entries texts.
+        """
+        with self.lock:
+            keys = self._band_keys(signature)
+            entry_id = self.next_id
+            self.next_id += 1
+            self.entries[entry_id] = (signature, keys, value)
+            for bucket, key in zip(self.buckets, keys):
+                bucket[key] = entry_id
+
+            while len(self.entries) > self.max_entries:
+                old_id, (_, old_keys, _) = self.entries.popitem(last=False)
+                for bucket, key in zip(self.buckets, old_keys):
+                    if bucket.get(key) == old_id:
+                        del bucket[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            for bucket in self.buckets:
+                bucket.clear()
+
+    def stats(self):
+        """
+        Returns a dict of the number of lookups and hits, the hit rate,
+        the number of remembered texts and an estimate of the memory
+        they use in bytes.
+        """
+        with self.lock:
+            memory = 0
+            for (signature, keys, value) in self.entries.values():
+                memory += signature.nbytes + sys.getsizeof(value)
+                memory += sum(sys.getsizeof(k) for k in keys)
+            for bucket in self.buckets:
+                memory += sys.getsizeof(bucket)
+            hit_rate = 0.0
+            if self.lookups > 0:
+                hit_rate = self.hits / self.lookups
+            return {"lookups": self.lookups,
+                    "hits": self.hits,
+                    "hit_rate": hit_rate,
+                    "entries": len(self.entries),
+                    "memory_bytes": memory}
@@ -0,0 +1,152 @@
+# dispatch.py
+#
+# This file defines the dispatcher that hands data from an input
+# module off to a pool of worker threads (Scenario 3 in the
+# InputModule documentation).
+
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Put on the queue to tell a worker thread to stop.
+_STOP = object()
+
+
+class InputDispatcher:
+    """
+    InputDispatcher sits between an InputModule and the rest of the
+    chain. The input module's handler only puts the data on a bounded
+    queue, and a pool of worker threads takes the data off the queue
+    and runs it through the chain, so the thread of the input module
+    (for example the TwitterStreamAPI thread) is not blocked by
+    classification.
+
+    When the queue is full, the policy decides what happens:
+    "block" - the input module waits until there is room.
+    "drop-newest" - the new data is dropped.
+    "drop-oldest" - the oldest data in the queue is dropped to make
+    room for the new data.
+
+    Note that with more than one worker the data is not guaranteed to
+    reach the output module in the order it was input, and the modules
+    of the chain are called from several threads.
+
+    Members
+    -------
+    n_workers : Int
+    The number of worker threads.
+
+    queue_size : Int
+    The maximum number of inputs waiting for a worker.
+
+    policy : String
+    The policy used when the queue is full. Read above on usage.
+    """
+    POLICIES = ("block", "drop-newest", "drop-oldest")
+
+    def __init__(self, n_workers=4, queue_size=1000, policy="block"):
+        if policy not in InputDispatcher.POLICIES:
+            raise ValueError("Unknown dispatch policy \"{}\", expected one \
+of {}.".format(policy, InputDispatcher.POLICIES))
+        self.n_workers = n_workers
+        self.queue_size = queue_size
+        self.policy = policy
+
+        self.queue = queue.Queue(queue_size)
+        self.threads = list()
+        self.handler = None
+
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self, handler):
+        """
+        Starts the worker threads, which call handler with each input.
+        """
+        self.handler = handler
+        for i in range(self.n_workers):
+            t = threading.Thread(target=self._work,
+                                 name="InputDispatcher-{}".format(i),
+                                 daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def stop(self, wait=True):
+        """
+        Stops the worker threads once the inputs already in the queue
+        have been handled. If wait is True, this blocks until they have
+        all stopped.
+        """
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        if wait:
+            for t in self.threads:
+                t.join()
+        self.threads = list()
+
+    def submit(self, data):
+        """
+        Puts data on the queue for a worker thread. This is set as the
+        handler of the input module.
+        """
+        with self.lock:
+            self.submitted += 1
+
+        if self.policy == "block":
+            self.queue.put(data)
+            return
+
+        try:
+            self.queue.put_nowait(data)
+            return
+        except queue.Full:
+            pass
+
+        dropped = 1
+        if self.policy == "drop-oldest":
+            # The oldest input is dropped, and the new one too if
+            # another thread filled the queue again in the meantime
+            dropped = 0
+            try:
+                self.queue.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(data)
+            except queue.Full:
+                dropped += 1
+        with self.lock:
+            self.dropped += dropped
+
+    def stats(self):
+        """
+        Returns a dict of the dispatcher's counters and the number of
+        inputs currently waiting in the queue.
+        """
+        with self.lock:
+            return {"queue_depth": self.queue.qsize(),
+                    "submitted": self.submitted,
+                    "processed": self.processed,
+                    "dropped": self.dropped,
+                    "errors": self.errors}
+
+    def _work(self):
+        while True:
+            data = self.queue.get()
+            if data is _STOP:
+                return
+            try:
+                self.handler(data)
+                with self.lock:
+                    self.processed += 1
+            except Exception:
+                with self.lock:
+                    self.errors += 1
+                logger.exception("Error handling input in %s.",
+                                 threading.current_thread().name)
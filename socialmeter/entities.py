@@ -0,0 +1,39 @@
+# entities.py
+#
+# This file defines the scanner that finds the entities of a text
+# (hashtags, mentions, URLs, emoticons and punctuation runs) in a
+# single pass.
+
+import re
+
+HASHTAG = "hashtag"
+MENTION = "mention"
+URL = "url"
+EMOTICON = "emoticon"
+PUNCTUATION = "punctuation"
+
+# Emoticons such as :) ;-( :D and <3. They must not be followed by a
+# word character, so the ":D" of "ratio:Data" is not an emoticon.
+EMOTICON_PATTERN = r"(?:<3|[<>]?[:;=][\-o*']?[)\](\[dDpP/\\|{}@])(?!\w)"
+
+# Hashtags and mentions must follow a character that is not part of a
+# word, as in the original '\W(\#[a-zA-Z]+)' hashtag expression, so one
+# at the very start of the text is not an entity.
+ENTITY_REGEX = re.compile(r"""
+    (?P<url>(?:https?://|www\.)\S+)
+  | (?<=\W)(?P<hashtag>\#[a-zA-Z]+)
+  | (?<=\W)(?P<mention>@[a-zA-Z]+)
+  | (?P<emoticon>{})
+  | (?P<punctuation>[!?.]{{2,}})
+""".format(EMOTICON_PATTERN), re.VERBOSE)
+
+
+def scan(text):
+    """
+    Returns a list of the entities of text, in the order they appear.
+    Each entity is a (kind, start, end, value) tuple, where kind is one
+    of HASHTAG, MENTION, URL, EMOTICON or PUNCTUATION and value is the
+    matched text.
+    """
+    return [(m.lastgroup, m.start(), m.end(), m.group())
+            for m in ENTITY_REGEX.finditer(text)]
@@ -0,0 +1,250 @@
+# group.py
+#
+# This file defines the MeterGroup, which runs several meters that
+# share their preprocessing and feature extraction on one input.
+
+from socialmeter.analysis import ExtractionPlan, TextAnalysis
+from socialmeter.chain_links import Record
+from socialmeter.sparse import feature_matrix
+
+
+def _tokenizer_name(tokenizer):
+    # None is the default tokenizer of the process
+    if tokenizer is None:
+        return None
+    return tokenizer.name
+
+
+class MeterGroup:
+    """
+    MeterGroup runs several SMeters on the data of one input module.
+    Meters that differ only in their classifier (as in
+    demo.create_smeters) would each preprocess the text and extract
+    the same features; in a group every record is preprocessed and has
+    its features extracted once, and the features are then given to
+    the classifier and output module of every meter.
+
+    Preprocess modules are shared when the meters use the same module
+    object. Preclass modules are shared when they are the same object
+    or their extractors have the same signature (see
+    FeatureExtractor.signature), in which case the feature is copied to
+    the key each meter expects. A meter whose preclass key is already
+    used for a different feature, or whose tokenizer is not the one of
+    the group, cannot be added.
+
+    The texts are analysed with the tokenizer of the meters. The
+    feature caches, feature stores and dedup indexes of the meters are
+    not used, since the group extracts the features itself.
+
+    Members
+    -------
+    meters : List(SMeter)
+    The meters of the group, each with a class_mod and output_mod.
+
+    preprocess_mods : List(Module)
+    The distinct preprocess modules of the meters.
+
+    preclass_mods : List(Tuple(Module, List(String)))
+    The distinct preclass modules of the meters, each with the keys
+    its feature is stored under.
+
+    column_format : List(String)
+    The columns of every meter, and "text".
+
+    tokenizer : Object
+    The tokenizer of the meters (see SMeter.tokenizer).
+    """
+    def __init__(self, meters=None):
+        self.meters = list()
+        self.input_mod = None
+        self.preprocess_mods = list()
+        self.preclass_mods = list()
+        self.column_format = ["text"]
+        self.record_index = {"text": 0}
+        self.plan = None
+        self.tokenizer = None
+
+        if meters is not None:
+            for m in meters:
+                self.add_meter(m)
+
+    def add_meter(self, meter):
+        if len(self.meters) > 0 and \
+           _tokenizer_name(meter.tokenizer) != \
+           _tokenizer_name(self.tokenizer):
+            raise ValueError("The meter's tokenizer is not the tokenizer "
+                             "of the group.")
+
+        # Find the shared modules before changing the group, so that a
+        # meter that cannot be added leaves it as it was
+        preclass_mods = [(m, keys[:]) for (m, keys) in self.preclass_mods]
+        for mod in meter.preclass_link.mods:
+            shared = self._find_preclass(mod, preclass_mods)
+            for other in preclass_mods:
+                if other is not shared and mod.key in other[1]:
+                    raise ValueError("The key {} is used for a different "
+                                     "feature in the group."
+                                     .format(mod.key))
+            if shared is None:
+                preclass_mods.append((mod, [mod.key]))
+            elif mod.key not in shared[1]:
+                shared[1].append(mod.key)
+
+        self.meters.append(meter)
+        self.preclass_mods = preclass_mods
+        self.tokenizer = meter.tokenizer
+        self.plan = None
+
+        for mod in meter.preprocess_link.mods:
+            if not any(mod is m for m in self.preprocess_mods):
+                self.preprocess_mods.append(mod)
+
+        for k in meter.column_format:
+            if k not in self.record_index:
+                self.record_index[k] = len(self.column_format)
+                self.column_format.append(k)
+        if self.input_mod is not None:
+            self.input_mod.set_column_format(self.column_format)
+
+    def _find_preclass(self, mod, preclass_mods):
+        signature = mod.feature_extractor.signature()
+        for shared in preclass_mods:
+            m = shared[0]
+            if m is mod or m.feature_extractor.signature() == signature:
+                return shared
+        return None
+
+    def extraction_plan(self):
+        """
+        Returns the ExtractionPlan of the distinct extractors of the
+        group.
+        """
+        if self.plan is None:
+            extractors = list()
+            for m in self.preprocess_mods:
+                if hasattr(m, "preprocess_extractor"):
+                    extractors.append(m.preprocess_extractor)
+            for (m, _) in self.preclass_mods:
+                extractors.append(m.feature_extractor)
+            self.plan = ExtractionPlan(extractors)
+        return self.plan
+
+    def extract_features(self, texts):
+        """
+        Extracts the feature of every distinct preclass module for
+        every text. Returns a dict of each key to the list of features
+        of the texts.
+        """
+        features = dict()
+        for (_, keys) in self.preclass_mods:
+            for k in keys:
+                features[k] = list()
+
+        for t in texts:
+            analysis = TextAnalysis(t, self.tokenizer)
+            for (m, keys) in self.preclass_mods:
+                f = m.feature_extractor.extract_analysis(analysis)
+                for k in keys:
+                    features[k].append(f)
+        return features
+
+    def _meter_features(self, meter, features):
+        columns = [features[m.key] for m in meter.preclass_link.mods]
+        return feature_matrix([list(row) for row in zip(*columns)])
+
+    def train(self, training_data):
+        """
+        Trains the classifier of every meter, extracting the features
+        of the training texts once for all of them.
+        """
+        features = self.extract_features(training_data[0])
+        for meter in self.meters:
+            meter.class_mod.train((self._meter_features(meter, features),
+                                   training_data[1]))
+
+    def classify_many(self, texts):
+        """
+        Classifies a list of texts with every meter. Returns a list of
+        the classifications of each meter, in the order of the meters.
+        """
+        features = self.extract_features(texts)
+        return [meter.class_mod.classify(self._meter_features(meter,
+                                                              features))
+                for meter in self.meters]
+
+    def is_ready(self):
+        return self.input_mod is not None\
+           and len(self.meters) > 0\
+           and all(m.class_mod is not None and m.output_mod is not None
+                   for m in self.meters)
+
+    def start_if_ready(self):
+        if self.is_ready():
+            self.extraction_plan()
+            for meter in self.meters:
+                meter.set_classifier_keys()
+                if meter.micro_batcher is not None:
+                    meter.micro_batcher.start(meter)
+
+            self.input_mod.start()
+
+            for meter in self.meters:
+                if meter.micro_batcher is not None:
+                    meter.micro_batcher.stop()
+        else:
+            print("Not ready to start.")
+
+    def new_input(self, input_data):
+        """
+        Called when there is new input from the input module. The input
+        is preprocessed and its features are extracted once, and then
+        each meter classifies and outputs its own copy of the record.
+        """
+        values = [None] * len(self.column_format)
+        for k, i in self.record_index.items():
+            if k in input_data:
+                values[i] = input_data[k]
+        record = Record(self.record_index, values)
+        if record["text"] is None:
+            record["text"] = ""
+        if self.tokenizer is not None:
+            record.set_tokenizer(self.tokenizer)
+
+        for m in self.preprocess_mods:
+            record = m.process(record)
+        for (m, keys) in self.preclass_mods:
+            record = m.process(record)
+            for k in keys[1:]:
+                record[k] = record[keys[0]]
+
+        for meter in self.meters:
+            data = meter.format_input(record)
+            if meter.released is not None:
+                # The meter's own preprocess and preclass stages are
+                # skipped, so release what they would have
+                meter.release_columns(data, meter.released["preprocess"] +
+                                      meter.released["preclass"])
+            meter.preclass_finished(data)
+
+    #  Getters, setters and adders
+
+    def set_input_mod(self, input_mod):
+        self.input_mod = input_mod
+        self.input_mod.set_column_format(self.column_format)
+        self.input_mod.set_handler(self.new_input)
+
+    def set_output_mod(self, o_mod):
+        """
+        Sets the output module of every meter of the group.
+        """
+        for meter in self.meters:
+            meter.set_output_mod(o_mod)
+
+    def set_handler(self, handler):
+        """
+        Sets the handler of every meter of the group. handler is called
+        with the meter and the output data.
+        """
+        for meter in self.meters:
+            meter.set_handler(
+                lambda data, meter=meter: handler(meter, data))
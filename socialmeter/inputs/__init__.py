@@ -1,4 +1,14 @@
 # inputs.__init__.py
+#
+# The input modules are imported when they are first used, so that
+# importing this package does not import tweepy or facebook-sdk.
 
-from .facebookgraph import FacebookGraphModule
-from .twitterstream import TwitterStreamModule
+from ..lazy import lazy_module
+
+_exports = {
+    "FacebookGraphModule": ".facebookgraph",
+    "TwitterStreamModule": ".twitterstream",
+}
+
+__all__ = list(_exports.keys())
+lazy_module(globals(), _exports)
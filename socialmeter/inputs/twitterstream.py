@@ -6,8 +6,6 @@ from tweepy.streaming import StreamListener
 from tweepy import OAuthHandler
 from tweepy import Stream
 
-import pandas as pd
-
 import json
 
 
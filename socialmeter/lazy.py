@@ -0,0 +1,54 @@
+# lazy.py
+#
+# This file defines the helpers the socialmeter packages use to import
+# their modules (and the third party libraries those modules need)
+# only when one of their classes is first used.
+
+import importlib
+import sys
+import types
+
+
+def lazy_getattr(package_globals, exports, modules=()):
+    """
+    Returns a __getattr__ function for the package with the globals
+    `package_globals`. `exports` maps each exported name to the module
+    (relative to the package) that defines it, and `modules` are the
+    names of submodules that are exported themselves. The module is
+    imported the first time the name is used, and the name is then
+    stored in the package so later uses do not go through __getattr__.
+    """
+    package = package_globals["__name__"]
+
+    def __getattr__(name):
+        if name in modules:
+            value = importlib.import_module("." + name, package)
+        elif name in exports:
+            module = importlib.import_module(exports[name], package)
+            value = getattr(module, name)
+        else:
+            raise AttributeError("module {!r} has no attribute {!r}"
+                                 .format(package, name))
+        package_globals[name] = value
+        return value
+
+    return __getattr__
+
+
+def lazy_module(package_globals, exports, modules=()):
+    """
+    Makes the names in exports and modules (see lazy_getattr) lazy
+    attributes of the package with the globals `package_globals`.
+
+    A module level __getattr__ (PEP 562) is only used by Python 3.7
+    and later, so instead the package module's class is replaced with
+    a subclass of ModuleType whose __getattr__ imports the names, which
+    works on every Python 3 version the package supports.
+    """
+    getattr_function = lazy_getattr(package_globals, exports, modules)
+
+    class LazyModule(types.ModuleType):
+        def __getattr__(self, name):
+            return getattr_function(name)
+
+    sys.modules[package_globals["__name__"]].__class__ = LazyModule
@@ -5,13 +5,13 @@ from ..chain_links import Module
 
 class OutputModule(Module):
     """
-    OutputModule takes the pandas DataFrame and converts it
+    OutputModule takes the Record and converts it
     to a dict.
 
     It ensures that there is a text field in the dictionary.
     """
     def process(self, data):
-        # Convert dataframe to dict
+        # Convert the record to a dict
         d = data.to_dict()
 
         # If we don't have text
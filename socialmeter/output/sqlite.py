@@ -3,12 +3,22 @@
 from ..chain_links import Module
 
 import sqlite3
+import threading
 
 
 class SQLiteModule(Module):
+    """
+    SQLiteModule inserts the text and classification of each record
+    into the sentiments table of a SQLite database.
+
+    The connection may be used from threads other than the one that
+    connected (for example when the meter runs its stages in an
+    executor), so access to it is serialized with a lock.
+    """
     def __init__(self):
         super().__init__()
         self.connection = None
+        self.lock = threading.Lock()
 
     def setup_db(self, filename):
         """
@@ -25,13 +35,27 @@ class SQLiteModule(Module):
         self.connection.close()
 
     def connect_to_db(self, filename):
-        self.connection = sqlite3.connect(filename)
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
 
     def process(self, data):
         text = data['text']
         s = data['classification']
 
-        c = self.connection.cursor()
-        c.execute("INSERT INTO sentiments VALUES (?, ?)", (text, s))
+        with self.lock:
+            c = self.connection.cursor()
+            c.execute("INSERT INTO sentiments VALUES (?, ?)", (text, s))
 
-        self.connection.commit()
+            self.connection.commit()
+
+    def process_batch(self, datas):
+        """
+        Inserts the whole batch with executemany and commits once.
+        """
+        rows = [(d['text'], d['classification']) for d in datas]
+
+        with self.lock:
+            c = self.connection.cursor()
+            c.executemany("INSERT INTO sentiments VALUES (?, ?)", rows)
+
+            self.connection.commit()
+        return [None for _ in datas]
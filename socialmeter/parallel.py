@@ -0,0 +1,86 @@
+# parallel.py
+#
+# This file defines the process pool used by SMeter.extract_features
+# to extract features on several cores.
+
+import multiprocessing
+
+from socialmeter.analysis import TextAnalysis
+
+# The feature extractors used by a worker process and the artifacts
+# they need. They are sent to each worker once when the pool starts
+# instead of with every chunk.
+_extractors = None
+_artifacts = ()
+_tokenizer = None
+
+
+def warmup(artifacts=("tokens", "pos_tags")):
+    """
+    Computes the given artifacts of a short text, which loads the NLTK
+    tokenizer and tagger models if they are needed so that the first
+    text a worker extracts does not pay for loading them.
+    """
+    analysis = TextAnalysis("Warm up the tagger.")
+    try:
+        for name in artifacts:
+            analysis.get(name)
+    except LookupError:
+        # The models are not installed, extracting will raise the
+        # error if an extractor actually needs them.
+        pass
+
+
+def _init_worker(extractors, artifacts, tokenizer):
+    global _extractors, _artifacts, _tokenizer
+    _extractors = extractors
+    _artifacts = artifacts
+    _tokenizer = tokenizer
+    warmup(artifacts)
+
+
+def extract_chunk(extractors, texts, artifacts=(), tokenizer=None):
+    """
+    Extracts the features of every text with the list of feature
+    extractors, tokenizing with tokenizer (None for the default). If
+    the extractors need POS tags, the whole chunk is tagged at once.
+    """
+    analyses = [TextAnalysis(t, tokenizer) for t in texts]
+    if "pos_tags" in artifacts:
+        from socialmeter import tagger
+        tagger.tag_analyses(analyses)
+
+    features = list()
+    for analysis in analyses:
+        features.append([fe.extract_analysis(analysis)
+                         for fe in extractors])
+    return features
+
+
+def _extract_chunk(texts):
+    return extract_chunk(_extractors, texts, _artifacts, _tokenizer)
+
+
+def extract_parallel(extractors, texts, n_workers, chunk_size,
+                     artifacts=("tokens", "pos_tags"), tokenizer=None):
+    """
+    Extracts the features of every text with the list of feature
+    extractors on a pool of n_workers processes. The texts are split
+    into chunks of chunk_size texts and the features are returned in
+    the same order as the texts. Each worker warms up the TextAnalysis
+    artifacts in `artifacts` when it starts, and tokenizes with
+    tokenizer.
+    """
+    texts = list(texts)
+    chunks = [texts[i:i + chunk_size]
+              for i in range(0, len(texts), chunk_size)]
+
+    with multiprocessing.Pool(n_workers, initializer=_init_worker,
+                              initargs=(extractors, artifacts,
+                                        tokenizer)) as pool:
+        results = pool.map(_extract_chunk, chunks)
+
+    features = list()
+    for r in results:
+        features.extend(r)
+    return features
@@ -0,0 +1,155 @@
+# pipeline.py
+#
+# This file defines the asyncio run mode of the SMeter, where each
+# stage of the chain runs as its own coroutine.
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Passed down the queues to tell each stage that the input has ended.
+_END = object()
+
+
+class AsyncPipeline:
+    """
+    AsyncPipeline runs the stages of an SMeter (preprocessing,
+    preclassification, classification and output) as coroutines that
+    are connected by bounded asyncio queues, so that a slow stage like
+    a database commit does not stall the input module.
+
+    The work of each stage is done in an executor so the event loop is
+    never blocked, and each stage handles one record at a time so the
+    order of the records is kept. The input module is started on its
+    own thread; when the first queue is full its handler blocks until
+    there is room, which passes the backpressure on to the input.
+
+    A record that a stage fails on is logged to the
+    socialmeter.pipeline logger, counted in errors and dropped, and
+    the stage goes on with the next record. Near duplicates are looked
+    up in the meter's dedup index like in new_input. The meter's
+    MicroBatcher is not used, since every stage handles one record at
+    a time; use start_if_ready to classify in micro-batches.
+
+    Members
+    -------
+    meter : SMeter
+    The meter whose modules are run.
+
+    queue_size : Int
+    The maximum number of records waiting in front of each stage.
+
+    executor : concurrent.futures.Executor
+    The executor the stages run their modules in. None uses the
+    event loop's default thread pool.
+
+    errors : Int
+    The number of records that were dropped because a stage failed.
+    """
+    def __init__(self, meter, queue_size=100, executor=None):
+        self.meter = meter
+        self.queue_size = queue_size
+        self.executor = executor
+        self.errors = 0
+
+    async def run(self, loop=None):
+        """
+        Starts the input module and runs every record it produces
+        through the chain on loop (by default the current event loop).
+        Returns once the input module has finished and every record has
+        been output. The input module's handler is restored afterwards.
+        """
+        meter = self.meter
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        queues = [asyncio.Queue(self.queue_size) for _ in range(4)]
+
+        def duplicate(data):
+            # Duplicates have their features and classification from
+            # the dedup index, so they skip to the output stage
+            return meter.dedup_index is not None and \
+                data.analysis().artifacts.get("duplicate", False)
+
+        def preprocess(input_data):
+            data = meter.format_input(input_data)
+            if meter.dedup_index is not None and \
+               meter.run_stage("dedup", meter.reuse_duplicate, data):
+                if meter.released is not None:
+                    meter.release_columns(data,
+                                          meter.released["preprocess"] +
+                                          meter.released["preclass"] +
+                                          meter.released["classify"])
+                return data
+            return meter.run_stage("preprocess",
+                                   meter.preprocess_link.process, data)
+
+        def preclass(data):
+            if duplicate(data):
+                return data
+            return meter.run_stage("preclass", meter.preclass_process, data)
+
+        def classify(data):
+            if duplicate(data):
+                return data
+            return meter.run_stage("classify", meter.class_mod.process, data)
+
+        def output(data):
+            if meter.dedup_index is not None:
+                meter.remember_duplicate(data)
+            return meter.run_stage("output", meter.output_mod.process, data)
+
+        stages = [("preprocess", preprocess), ("preclass", preclass),
+                  ("classify", classify), ("output", output)]
+        tasks = list()
+        for i in range(len(stages)):
+            out_q = None
+            if i + 1 < len(queues):
+                out_q = queues[i + 1]
+            name, process = stages[i]
+            tasks.append(loop.create_task(
+                self._run_stage(name, process, queues[i], out_q, loop)))
+
+        def submit(input_data):
+            # Called on the input thread, blocks while the queue is full
+            future = asyncio.run_coroutine_threadsafe(
+                queues[0].put(input_data), loop)
+            future.result()
+
+        input_executor = ThreadPoolExecutor(max_workers=1)
+        # The handler set by set_input_mod or set_dispatcher
+        handler = meter.input_mod.handler
+        meter.input_mod.set_handler(submit)
+        try:
+            await loop.run_in_executor(input_executor, meter.input_mod.start)
+            await queues[0].put(_END)
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+            meter.input_mod.set_handler(handler)
+            input_executor.shutdown(wait=False)
+
+    async def _run_stage(self, name, process, in_q, out_q, loop):
+        while True:
+            data = await in_q.get()
+            if data is _END:
+                if out_q is not None:
+                    await out_q.put(_END)
+                return
+
+            try:
+                data = await loop.run_in_executor(self.executor, process,
+                                                  data)
+                if out_q is None:
+                    self.meter.output_finished(data)
+            except Exception:
+                # Drop the record, but keep draining the queue so the
+                # input thread never blocks on a stage that has died
+                self.errors += 1
+                logger.exception("The %s stage failed on a record, it "
+                                 "was dropped.", name)
+                continue
+            if out_q is not None:
+                await out_q.put(data)
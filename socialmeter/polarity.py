@@ -0,0 +1,188 @@
+# polarity.py
+#
+# This file defines the table of SentiWordNet adjective polarities used
+# by AdjectiveRatioFE, and the table shared by every module of the
+# process.
+
+import threading
+from collections import OrderedDict
+
+POSITIVE = 1
+NEGATIVE = -1
+# Words that have no SentiWordNet adjective synset
+UNKNOWN = 0
+
+# The dtype of a saved table, sorted on the word
+TABLE_DTYPE = [("word", "S40"), ("polarity", "i1")]
+
+_table = None
+_lock = threading.Lock()
+
+
+def sentiwordnet_polarity(word):
+    """
+    Looks word up in SentiWordNet as the first adjective sense
+    ("word.a.01") and returns POSITIVE if its positive score is higher
+    than its negative score, NEGATIVE if it is not, and UNKNOWN if the
+    word has no such synset.
+    """
+    from nltk.corpus import sentiwordnet as sw
+    from nltk.corpus.reader.wordnet import WordNetError
+
+    try:
+        score = sw.senti_synset("{}.a.01".format(word))
+    except (WordNetError, ValueError):
+        # A word that isn't a word or was incorrectly identified as an
+        # adjective
+        return UNKNOWN
+    if score is None:
+        return UNKNOWN
+    if score.pos_score() > score.neg_score():
+        return POSITIVE
+    return NEGATIVE
+
+
+class PolarityTable:
+    """
+    PolarityTable maps adjectives to their SentiWordNet polarity
+    (POSITIVE, NEGATIVE or UNKNOWN). Words are looked up in lower case,
+    as WordNet does.
+
+    The polarity of the max_entries most recently used words, unknown
+    words included, is kept in memo, so that a word is looked up in
+    SentiWordNet once for as long as it is in use. A table can be
+    saved to a .npy file and loaded memory-mapped, in which case the
+    loaded words are looked up with a binary search and SentiWordNet
+    is not used at all: a word that is not in a loaded table is
+    UNKNOWN. Build a complete table with from_sentiwordnet.
+
+    Members
+    -------
+    memo : OrderedDict(String, Int)
+    The polarity of the words that have been looked up, least
+    recently used first.
+
+    max_entries : Int
+    The maximum number of words in memo, or None for no limit.
+
+    table : numpy.ndarray
+    The loaded table of (word, polarity) sorted on the word, or None
+    to look words up in SentiWordNet.
+    """
+    def __init__(self, table=None, max_entries=100000):
+        self.memo = OrderedDict()
+        self.max_entries = max_entries
+        self.table = table
+
+    def polarity(self, word):
+        word = word.lower()
+        memo = self.memo
+        p = memo.get(word)
+        if p is not None:
+            try:
+                memo.move_to_end(word)
+            except KeyError:
+                # Evicted by another thread in the meantime
+                pass
+            return p
+
+        if self.table is None:
+            p = sentiwordnet_polarity(word)
+        else:
+            p = self._search(word)
+        memo[word] = p
+        if self.max_entries is not None:
+            while len(memo) > self.max_entries:
+                try:
+                    memo.popitem(last=False)
+                except KeyError:
+                    break
+        return p
+
+    def _search(self, word):
+        import numpy as np
+
+        key = word.encode('utf-8')
+        words = self.table["word"]
+        i = int(np.searchsorted(words, key))
+        if i < len(words) and words[i] == key:
+            return int(self.table["polarity"][i])
+        return UNKNOWN
+
+    def add_words(self, words):
+        """
+        Looks every word of words up, so that they are in memo (or
+        the most recent max_entries of them).
+        """
+        for w in words:
+            self.polarity(w)
+
+    def save(self, filename):
+        """
+        Saves the words of the loaded table and of memo to filename as
+        a structured .npy array sorted on the word. Words longer than
+        40 bytes are not saved, and neither are words that have been
+        evicted from memo.
+        """
+        import numpy as np
+
+        entries = dict()
+        if self.table is not None:
+            for w, p in self.table:
+                entries[w] = int(p)
+        for w, p in self.memo.items():
+            key = w.encode('utf-8')
+            if len(key) <= 40:
+                entries[key] = p
+
+        array = np.array(sorted(entries.items()), dtype=TABLE_DTYPE)
+        with open(filename, 'wb') as f:
+            np.save(f, array)
+
+    @staticmethod
+    def load(filename):
+        """
+        Loads a table saved with save, memory-mapped so that processes
+        loading the same file share its pages.
+        """
+        import numpy as np
+        return PolarityTable(np.load(filename, mmap_mode='r'))
+
+    @staticmethod
+    def from_sentiwordnet():
+        """
+        Returns a table with the polarity of every adjective lemma in
+        WordNet, for saving with save. This reads the whole of
+        SentiWordNet and takes a while.
+        """
+        from nltk.corpus import wordnet as wn
+
+        table = PolarityTable(max_entries=None)
+        table.add_words(wn.all_lemma_names(pos="a"))
+        return table
+
+
+def get_table():
+    """
+    Returns the polarity table of the process, which starts empty and
+    looks words up in SentiWordNet as they are needed.
+    """
+    global _table
+    if _table is None:
+        with _lock:
+            if _table is None:
+                _table = PolarityTable()
+    return _table
+
+
+def set_table(table):
+    """
+    Sets the polarity table used by every AdjectiveRatioFE that has no
+    table of its own. table is a PolarityTable, the filename of a saved
+    table, or None for a new table that uses SentiWordNet.
+    """
+    global _table
+    if isinstance(table, str):
+        table = PolarityTable.load(table)
+    with _lock:
+        _table = table
@@ -5,6 +5,7 @@ from .adjratio import AdjectiveRatioFE
 from .emoticon import EmoticonSentimentFE
 from .excesscaps import ExcessiveCapitalsFE
 from .excesspunc import ExcessivePunctuationFE
+from .hashedngram import HashedNGramFE
 from .hashtagcount import HashtagCountFE
 from .neginfluence import NegativeInfluenceFE
 from .wordcount import WordCountFE
@@ -1,10 +1,12 @@
 # adjcount.py
 
-import nltk
+from ..analysis import TextAnalysis
 from ..chain_links import FeatureExtractor
 
 
 class AdjectiveCounterFE(FeatureExtractor):
+    requires = ("pos_tags",)
+
     def __init__(self):
         super().__init__()
         discrete_format = ["0_0", "1_2", "2<"]
@@ -17,10 +19,11 @@ class AdjectiveCounterFE(FeatureExtractor):
     using the nltk pos_tag function and returns the discrete result.
     """
     def extract(self, text):
-        tokens = nltk.word_tokenize(text)
-        pos_tags = nltk.pos_tag(tokens)
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
         adj_count = 0
-        for word, tag in pos_tags:
+        for word, tag in analysis.pos_tags():
             if tag[0:2] == "JJ":
                 adj_count += 1
         return self.discretize_result(adj_count)
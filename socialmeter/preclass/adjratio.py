@@ -1,18 +1,30 @@
 # adjratio.py
 
+from .. import polarity
+from ..analysis import TextAnalysis
 from ..chain_links import FeatureExtractor
 
-import nltk
-from nltk.corpus import sentiwordnet as sw
-
 
 class AdjectiveRatioFE(FeatureExtractor):
+    requires = ("pos_tags",)
+
     def __init__(self):
         super().__init__()
         discrete_format = ["0.0_0.5", "0.5<"]
         d_values = [0, 1]
         self.set_discrete_format(discrete_format, d_values)
         self.key = "adjective-ratio"
+        self.polarity_table = None
+
+    def set_polarity_table(self, table):
+        """
+        Sets the PolarityTable (see socialmeter.polarity) the
+        adjectives are looked up in, or the filename of a saved one.
+        None uses the table shared by the process.
+        """
+        if isinstance(table, str):
+            table = polarity.PolarityTable.load(table)
+        self.polarity_table = table
 
     """
     AdjectiveRatioFE counts the number of positive and
@@ -23,27 +35,31 @@ class AdjectiveRatioFE(FeatureExtractor):
     the word as either positive or negative (this is a
     dumb feature extractor). The percentage of words that
     are positive is returned.
+
+    The scores are looked up in a PolarityTable, which looks each
+    word up in sentiwordnet only once, or in a precomputed table
+    loaded from a file.
     """
     def extract(self, text):
-        tokens = nltk.word_tokenize(text)
-        pos_tags = nltk.pos_tag(tokens)
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
+        table = self.polarity_table
+        if table is None:
+            table = polarity.get_table()
+
         # Identify the adjectives and get a score for them,
         # and then add to the number of pos or negs
         n_pos = 0
         n_neg = 0
-        for word, tag in pos_tags:
+        for word, tag in analysis.pos_tags():
             if tag[0:2] == "JJ":
                 # It is an adjective, get a score for it
-                try:
-                    score = sw.senti_synset("{}.a.01".format(word))
-                    if score.pos_score() > score.neg_score():
-                        n_pos += 1
-                    else:
-                        n_neg += 1
-                except:
-                    # found a word that isn't a word or was
-                    # incorrectly identified as an adjective
-                    pass
+                p = table.polarity(word)
+                if p == polarity.POSITIVE:
+                    n_pos += 1
+                elif p == polarity.NEGATIVE:
+                    n_neg += 1
         t = n_pos + n_neg
         if t == 0:
             return 0.0
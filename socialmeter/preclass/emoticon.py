@@ -1,12 +1,46 @@
 # emoticon.py
 
+import hashlib
+
+from ..analysis import TextAnalysis
 from ..chain_links import FeatureExtractor
 
 
 class EmoticonSentimentFE(FeatureExtractor):
-    def __init__(self):
+    """
+    EmoticonSentimentFE looks the whole text up in an emoticon
+    sentiment lexicon, so a text is 0 unless it is a single emoticon.
+
+    With scan, a text that is not in the lexicon has the emoticons
+    found in it (see socialmeter.entities) looked up instead, and the
+    sign of the sum of their sentiments is returned. This changes the
+    features of most texts, so it is part of the signature and models
+    trained without it should be retrained.
+
+    Members
+    -------
+    sentiments : Dict(String, Int)
+    The sentiment of each emoticon of the lexicon, empty until
+    set_file is called.
+
+    scan : Bool
+    Whether the emoticons in the text are looked up.
+    """
+    # For extractors saved before scan was added
+    scan = False
+
+    def __init__(self, scan=False):
         super().__init__()
         self.key = "emoticon-sentiment"
+        self.sentiments = dict()
+        self.set_scan(scan)
+
+    def set_scan(self, scan):
+        self.scan = scan
+        if scan:
+            self.requires = ("emoticons",)
+        else:
+            self.requires = ()
 
     def set_file(self, f):
         """
@@ -23,8 +57,29 @@ class EmoticonSentimentFE(FeatureExtractor):
             self.sentiments[emo] = sent
             l = f.readline()
 
+    def signature(self):
+        lexicon = repr(sorted(self.sentiments.items())).encode('utf-8')
+        signature = "{}[{}]".format(super().signature(),
+                                    hashlib.sha1(lexicon).hexdigest())
+        if self.scan:
+            signature += "[scan]"
+        return signature
+
     def extract(self, text):
-        if text in self.sentiments.keys():
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
+        text = analysis.text
+        if text in self.sentiments:
             return self.sentiments[text]
-        else:
+        if not self.scan:
             return 0
+
+        total = 0
+        for emo in analysis.get("emoticons"):
+            total += self.sentiments.get(emo, 0)
+        if total > 0:
+            return 1
+        elif total < 0:
+            return -1
+        return 0
@@ -1,10 +1,12 @@
 # excesscaps.py
 
-import nltk
+from ..analysis import TextAnalysis
 from ..chain_links import FeatureExtractor
 
 
 class ExcessiveCapitalsFE(FeatureExtractor):
+    requires = ("words",)
+
     def __init__(self):
         super().__init__()
         self.key = "excessive-caps"
@@ -14,8 +16,11 @@ class ExcessiveCapitalsFE(FeatureExtractor):
     all capitals in the sentence and then returns it.
     """
     def extract(self, text):
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
         all_caps = 0
-        tokens = text.split(' ')
+        tokens = analysis.get("words")
         for t in tokens:
             if t.upper() == t:
                 all_caps += 1
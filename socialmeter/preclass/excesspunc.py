@@ -1,10 +1,12 @@
 # excesspunc.py
 
+from ..analysis import TextAnalysis
 from ..chain_links import FeatureExtractor
-import nltk
 
 
 class ExcessivePunctuationFE(FeatureExtractor):
+    requires = ("pos_tags",)
+
     def __init__(self):
         super().__init__()
         self.key = "excessive-punctuation"
@@ -17,7 +19,10 @@ class ExcessivePunctuationFE(FeatureExtractor):
     as 1 and 2 characters respectively.
     """
     def extract(self, text):
-        pos_tokens = nltk.pos_tag(nltk.word_tokenize(text))
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
+        pos_tokens = analysis.pos_tags()
         conseq_count = 0
         total_count = 0
         for (token, pos) in pos_tokens:
@@ -0,0 +1,91 @@
+# hashedngram.py
+
+from ..analysis import TextAnalysis
+from ..chain_links import FeatureExtractor
+from ..preprocess.ngram import ngrams
+
+
+class HashedNGramFE(FeatureExtractor):
+    """
+    HashedNGramFE extracts the n-grams of a text as a sparse row of
+    counts. Each n-gram is hashed into one of n_features columns (the
+    hashing trick, with sklearn's FeatureHasher), so no vocabulary is
+    kept and the row has the same width however many n-grams the
+    corpus has.
+
+    The feature is a 1 x n_features scipy.sparse CSR matrix. The
+    SMeter's extract_features and the sklearn classifier modules turn
+    rows that have one into a sparse matrix (see socialmeter.sparse).
+    The counts are never negative, so MultinomialNBModule can use them.
+
+    Members
+    -------
+    n_features : Int
+    The number of columns n-grams are hashed into.
+
+    ngram_range : Tuple(Int, Int)
+    The smallest and largest n of the n-grams.
+
+    analyzer : String
+    "word" for n-grams of the lower case tokens, "char" for n-grams of
+    the characters of the lower case text.
+    """
+    def __init__(self, n_features=2 ** 18, ngram_range=(1, 2),
+                 analyzer="word"):
+        super().__init__()
+        self.key = "hashed-ngrams"
+        self.hasher = None
+        self.set_n_features(n_features)
+        self.set_ngram_range(ngram_range)
+        self.set_analyzer(analyzer)
+
+    def set_n_features(self, n_features):
+        self.n_features = n_features
+        self.hasher = None
+
+    def set_ngram_range(self, ngram_range):
+        self.ngram_range = tuple(ngram_range)
+
+    def set_analyzer(self, analyzer):
+        if analyzer not in ("word", "char"):
+            raise ValueError("Unknown analyzer \"{}\", use \"word\" or "
+                             "\"char\".".format(analyzer))
+        self.analyzer = analyzer
+        if analyzer == "word":
+            self.requires = ("lower_tokens",)
+        else:
+            self.requires = ()
+
+    def signature(self):
+        return "{}[{}, {}, {}]".format(super().signature(),
+                                       self.n_features, self.ngram_range,
+                                       self.analyzer)
+
+    def ngrams(self, analysis):
+        """
+        Returns the list of n-grams of the text of analysis, each as a
+        string.
+        """
+        if self.analyzer == "word":
+            items = analysis.get("lower_tokens")
+            sep = " "
+        else:
+            items = analysis.text.lower()
+            sep = ""
+
+        grams = list()
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            grams.extend(sep.join(g) for g in ngrams(items, n))
+        return grams
+
+    def extract(self, text):
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
+        if self.hasher is None:
+            from sklearn.feature_extraction import FeatureHasher
+            self.hasher = FeatureHasher(n_features=self.n_features,
+                                        input_type="string",
+                                        alternate_sign=False)
+        return self.hasher.transform([self.ngrams(analysis)])
@@ -1,17 +1,20 @@
 # hashtagcount.py
 
-import re
+from ..analysis import TextAnalysis
 from ..chain_links import FeatureExtractor
 
 
 class HashtagCountFE(FeatureExtractor):
+    requires = ("hashtags",)
+
     def __init__(self):
         super().__init__()
         self.key = "hashtag-count"
 
     def extract(self, text):
-        # Uses the regular expression '\W(\#[a-zA-Z]+)'
-        # to get all the hashtags
-        regex = r'\W(\#[a-zA-Z]+)'
-        r = re.findall(regex, text)
-        return len(r)
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
+        # The "hashtags" artifact matches '\W(\#[a-zA-Z]+)', see
+        # socialmeter.entities
+        return len(analysis.get("hashtags"))
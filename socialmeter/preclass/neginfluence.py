@@ -1,10 +1,12 @@
 # neginfluence.py
 
-import nltk
+from ..analysis import TextAnalysis
 from ..chain_links import FeatureExtractor
 
 
 class NegativeInfluenceFE(FeatureExtractor):
+    requires = ("lower_tokens",)
+
     def __init__(self):
         super().__init__()
         self.key = "negative-influence"
@@ -14,10 +16,13 @@ class NegativeInfluenceFE(FeatureExtractor):
     sentence and discretizes the result to odd or even number.
     """
     def extract(self, text):
-        tokens = nltk.word_tokenize(text)
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
+        tokens = analysis.get("lower_tokens")
         has_not = False
         for word in tokens:
-            if word.lower() == "not" or word.lower() == "n't":
+            if word == "not" or word == "n't":
                 has_not = not has_not
         r = None
         if has_not is False:
@@ -1,10 +1,12 @@
 # wordcount.py
 
-import nltk
+from ..analysis import TextAnalysis
 from ..chain_links import FeatureExtractor
 
 
 class WordCountFE(FeatureExtractor):
+    requires = ("pos_tags",)
+
     def __init__(self):
         super().__init__()
         self.key = "word-count"
@@ -14,6 +16,8 @@ class WordCountFE(FeatureExtractor):
     function.
     """
     def extract(self, text):
-        tokens = nltk.word_tokenize(text)
-        words = [(t, pos) for (t, pos) in nltk.pos_tag(tokens) if pos != "."]
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
+        words = [(t, pos) for (t, pos) in analysis.pos_tags() if pos != "."]
         return self.discretize_result(len(words))
@@ -1,6 +1,6 @@
 # hashtag.py
 
-import re
+from ..analysis import TextAnalysis
 from ..chain_links import PreprocessorExtractor
 
 
@@ -17,16 +17,22 @@ class HashtagPreprocessor(PreprocessorExtractor):
     tokenize hashtags as a single token, but this
     'hashtag symbol' (HT_HASHTAGTEXT) will be.
     """
+    requires = ("hashtags",)
+
     def __init__(self):
         super().__init__()
         self.key = "hashtag-pre"
 
     def extract(self, text):
-        regex = r'\W(\#[a-zA-Z]+)'
-        new = re.sub(regex, self.repl, text)
-        return new
+        return self.extract_analysis(TextAnalysis(text))
 
-    def repl(self, match):
-        m = match.group(0).split("#")[1]
-        s = " HT_{}".format(m.upper())
-        return s
+    def extract_analysis(self, analysis):
+        text = analysis.text
+        pieces = list()
+        last = 0
+        for (start, end, tag) in analysis.get("hashtags"):
+            pieces.append(text[last:start])
+            pieces.append(" HT_{}".format(tag.upper()))
+            last = end
+        pieces.append(text[last:])
+        return "".join(pieces)
@@ -1,6 +1,6 @@
 # mentions.py
 
-import re
+from ..analysis import TextAnalysis
 from ..chain_links import PreprocessorExtractor
 
 
@@ -16,16 +16,22 @@ class MentionPreprocessor(PreprocessorExtractor):
     single token, but this 'mention symbol' (MN_USERNAME) 
     will be.
     """
+    requires = ("mentions",)
+
     def __init__(self):
         super().__init__()
         self.key = "mention-pre"
-        
+
     def extract(self, text):
-        regex = r'\W(\@[a-zA-Z]+)'
-        new = re.sub(regex, self.repl, text)
-        return new
+        return self.extract_analysis(TextAnalysis(text))
 
-    def repl(self, match):
-        m = match.group(0).split("#")[1]
-        s = " MN_{}".format(m.upper())
-        return s
+    def extract_analysis(self, analysis):
+        text = analysis.text
+        pieces = list()
+        last = 0
+        for (start, end, name) in analysis.get("mentions"):
+            pieces.append(text[last:start])
+            pieces.append(" MN_{}".format(name.upper()))
+            last = end
+        pieces.append(text[last:])
+        return "".join(pieces)
@@ -1,15 +1,40 @@
 # ngram.py
 
+from ..analysis import TextAnalysis
 from ..chain_links import PreprocessorExtractor
 
 
+def ngrams(items, n):
+    """
+    Returns the list of n-grams of items, each a tuple of n consecutive
+    items.
+    """
+    # http://locallyoptimal.com/blog/2013/01/20/elegant-n-gram-generation-in-python/
+    return list(zip(*[items[i:] for i in range(n)]))
+
+
 class NGramPreprocessor(PreprocessorExtractor):
-    def __init__(self):
+    """
+    NGramPreprocessor extracts the n-grams of the words of the text,
+    each a tuple of n words.
+
+    Members
+    -------
+    n : Int
+    The number of words in each n-gram. Set with .set_n(n).
+    """
+    requires = ("words",)
+
+    def __init__(self, n=1):
         super().__init__()
         self.key = "ngram-pre"
+        self.n = n
+
+    def set_n(self, n):
+        self.n = n
 
-    # http://locallyoptimal.com/blog/2013/01/20/elegant-n-gram-generation-in-python/
     def extract(self, text):
-        input_list = text.split(' ')
-        return zip(*[input_list[i:] for i in range(1)])
+        return self.extract_analysis(TextAnalysis(text))
 
+    def extract_analysis(self, analysis):
+        return ngrams(analysis.get("words"), self.n)
@@ -1,6 +1,6 @@
 # pos_tag.py
 
-import nltk
+from ..analysis import TextAnalysis
 from ..chain_links import PreprocessorExtractor
 
 
@@ -8,6 +8,8 @@ class POSTagPreprocessor(PreprocessorExtractor):
     """
     Tags tokens as the POS and returns them.
     """
+    requires = ("pos_tags",)
+
     def __init__(self):
         super().__init__()
         self.key = "pos-tag"
@@ -15,5 +17,9 @@ class POSTagPreprocessor(PreprocessorExtractor):
     def extract(self, text):
         if type(text) is str:
             # Tokenize first
-            text = nltk.word_tokenize(text)
-        return nltk.pos_tag(text)
+            return self.extract_analysis(TextAnalysis(text))
+        from .. import tagger
+        return tagger.pos_tag(text)
+
+    def extract_analysis(self, analysis):
+        return analysis.pos_tags()
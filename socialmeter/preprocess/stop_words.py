@@ -1,6 +1,6 @@
 # stop_words.py
 
-import nltk
+from ..analysis import TextAnalysis
 from ..chain_links import PreprocessorExtractor
 
 
@@ -19,6 +19,8 @@ class StopWordsPreprocessor(PreprocessorExtractor):
     datasets, I don't feel comfortable including them in the
     project.
     """
+    requires = ("words",)
+
     def __init__(self):
         super().__init__()
         self.key = "stop-words"
@@ -35,7 +37,10 @@ class StopWordsPreprocessor(PreprocessorExtractor):
             self.stop_words.append(w)
 
     def extract(self, text):
-        t = text.split(' ')
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
+        t = analysis.get("words")
         l = list()
         for t in t:
             if t not in self.stop_words:
@@ -1,7 +1,7 @@
 # tokenize.py
 
+from ..analysis import TextAnalysis
 from ..chain_links import PreprocessorExtractor
-import nltk
 
 
 class TokenizerPreprocessor(PreprocessorExtractor):
@@ -9,11 +9,15 @@ class TokenizerPreprocessor(PreprocessorExtractor):
     Tokenizes the sentence using the nltk word_tokenize
     function.
     """
+    requires = ("tokens",)
+
     def __init__(self):
         super().__init__()
         self.key = "tokenize"
 
     def extract(self, text):
-        t = nltk.word_tokenize(text)
-        return t
+        return self.extract_analysis(TextAnalysis(text))
+
+    def extract_analysis(self, analysis):
+        return analysis.tokens()
 
@@ -0,0 +1,195 @@
+# profiling.py
+#
+# This file defines the profiler that the SMeter and its links use to
+# profile stages and modules when profiling is enabled.
+
+import cProfile
+import os
+import threading
+import tracemalloc
+
+# tracemalloc.reset_peak was added in Python 3.9. Before that, the
+# memory a call leaves allocated is reported instead of its peak.
+_CAN_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+
+
+class _Profile:
+    # The profile of a single stage or module
+    def __init__(self, cpu):
+        self.profile = cProfile.Profile() if cpu else None
+        self.calls = 0
+        self.records = 0
+        self.peak = 0
+        self.first_snapshot = None
+        self.last_snapshot = None
+
+
+class StageProfiler:
+    """
+    StageProfiler profiles the calls of the stages (for example
+    "extract" or "classify") and modules (for example
+    "preclass/word-count") of an SMeter with cProfile, and optionally
+    records their memory allocations with tracemalloc. Only the first
+    max_records records of each stage or module are profiled, so
+    profiling can be left on for a long run.
+
+    dump() writes a .prof file per stage or module, which can be read
+    with pstats or snakeviz, and a .alloc.txt file with the lines that
+    allocated the most memory while it was profiled.
+
+    Profiled calls are run one at a time and calls of a stage made
+    while another is profiled on the same thread (a module inside its
+    link, for example) are counted in the outer profile, so profiling
+    is meant for the single threaded run modes.
+
+    Members
+    -------
+    stages : List(String)
+    The names of the stages and modules to profile, or None for all.
+
+    max_records : Int
+    The number of records of each stage or module that are profiled.
+
+    cpu : Bool
+    Whether calls are profiled with cProfile.
+
+    memory : Bool
+    Whether allocations are recorded with tracemalloc.
+
+    directory : String
+    The directory dump() writes the reports to.
+    """
+    def __init__(self, stages=None, max_records=1000, cpu=True,
+                 memory=False, directory="profiles", top=25):
+        self.stages = stages
+        self.max_records = max_records
+        self.cpu = cpu
+        self.memory = memory
+        self.directory = directory
+        self.top = top
+
+        self.profiles = dict()
+        self.lock = threading.RLock()
+        self.active = threading.local()
+        self.started_tracemalloc = False
+
+    def wrap(self, name, process, n=1):
+        """
+        Returns a function that calls process and profiles it under
+        name, or process itself if name is not profiled or has used up
+        its max_records.
+        """
+        if self.stages is not None and name not in self.stages:
+            return process
+        p = self.profiles.get(name)
+        if p is not None and p.records >= self.max_records:
+            return process
+
+        def profiled(data):
+            return self.measure(name, process, data, n)
+        return profiled
+
+    def measure(self, name, process, data, n=1):
+        """
+        Calls process(data) and returns the result, profiling the call
+        under name.
+        """
+        if getattr(self.active, "name", None) is not None:
+            return process(data)
+
+        with self.lock:
+            p = self.profiles.get(name)
+            if p is None:
+                p = _Profile(self.cpu)
+                self.profiles[name] = p
+            if self.memory:
+                self._start_tracemalloc()
+                if p.first_snapshot is None:
+                    p.first_snapshot = tracemalloc.take_snapshot()
+                start_memory = tracemalloc.get_traced_memory()[0]
+                if _CAN_RESET_PEAK:
+                    tracemalloc.reset_peak()
+
+            self.active.name = name
+            try:
+                if p.profile is not None:
+                    p.profile.enable()
+                try:
+                    return process(data)
+                finally:
+                    if p.profile is not None:
+                        p.profile.disable()
+            finally:
+                self.active.name = None
+                p.calls += 1
+                p.records += n
+                if self.memory:
+                    current, peak = tracemalloc.get_traced_memory()
+                    if not _CAN_RESET_PEAK:
+                        # The peak is of the whole trace, use what the
+                        # call left allocated instead
+                        peak = current
+                    peak -= start_memory
+                    p.peak = max(p.peak, peak)
+                    if p.records >= self.max_records:
+                        p.last_snapshot = tracemalloc.take_snapshot()
+
+    def _start_tracemalloc(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+    def report(self):
+        """
+        Returns a dict of the number of calls and records profiled for
+        each stage and module, and the peak memory allocated by one of
+        their calls in KiB if memory is recorded (before Python 3.9,
+        the most memory one of their calls left allocated).
+        """
+        with self.lock:
+            r = dict()
+            for name, p in self.profiles.items():
+                r[name] = {"calls": p.calls, "records": p.records}
+                if self.memory:
+                    r[name]["peak_kib"] = p.peak / 1024
+            return r
+
+    def dump(self):
+        """
+        Writes the reports of every profiled stage and module to
+        directory and returns the names of the files written.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        files = list()
+        with self.lock:
+            for name, p in sorted(self.profiles.items()):
+                base = os.path.join(self.directory,
+                                    name.replace("/", "."))
+                if p.profile is not None:
+                    p.profile.dump_stats(base + ".prof")
+                    files.append(base + ".prof")
+                if p.first_snapshot is not None:
+                    last = p.last_snapshot
+                    if last is None:
+                        last = tracemalloc.take_snapshot()
+                    files.append(self._dump_allocations(name, p, last,
+                                                        base + ".alloc.txt"))
+        return files
+
+    def _dump_allocations(self, name, p, last, filename):
+        stats = last.compare_to(p.first_snapshot, "lineno")
+        with open(filename, 'w') as f:
+            f.write("Top allocations of {} over {} records (peak of "
+                    "one call {:.1f} KiB)\n".format(name, p.records,
+                                                     p.peak / 1024))
+            for s in stats[:self.top]:
+                f.write("{}\n".format(s))
+        return filename
+
+    def stop(self):
+        """
+        Stops tracemalloc if the profiler started it.
+        """
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
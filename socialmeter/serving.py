@@ -0,0 +1,359 @@
+# serving.py
+#
+# This file defines the sharded serving mode of the SMeter, where the
+# chain runs on several worker processes.
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+
+from socialmeter import parallel
+
+logger = logging.getLogger(__name__)
+
+# Passed to the workers to tell them that the input has ended.
+_END = None
+
+
+def _context():
+    # Forking shares the trained meter with the workers copy-on-write,
+    # fall back to spawning (which pickles the meter) where it is not
+    # available.
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+def _serve(worker_id, meter, tasks, results, current):
+    parallel.warmup(meter.extraction_plan().artifacts)
+    while True:
+        task = tasks.get()
+        if task is _END:
+            return
+        seq, input_datas = task
+        # Written straight to shared memory, so the server knows which
+        # batch was lost even if the worker is killed right away
+        current[worker_id] = seq
+
+        start = time.perf_counter()
+        try:
+            datas = [meter.format_input(d) for d in input_datas]
+            meter.analyze_batch(datas)
+            datas = [meter.run_stage("preprocess",
+                                     meter.preprocess_link.process, d)
+                     for d in datas]
+            datas = [meter.run_stage("preclass", meter.preclass_process, d)
+                     for d in datas]
+            datas = meter.run_stage("classify", meter.class_mod.process_batch,
+                                    datas, len(datas))
+            out, error = [d.to_dict() for d in datas], None
+        except Exception:
+            out, error = [], traceback.format_exc()
+        # A pipe sends synchronously, unlike a Queue whose feeder thread
+        # would lose the results it holds if the worker is killed
+        results.send((worker_id, seq, out, time.perf_counter() - start,
+                      error))
+
+
+class ShardedServer:
+    """
+    ShardedServer runs a trained SMeter on n_workers processes, so that
+    preprocessing, feature extraction and classification use every
+    core. The workers are forked when the server starts and share the
+    meter (and the NLTK models it has loaded) copy-on-write.
+
+    The input module runs on the calling thread and its data is sent to
+    the workers in batches of batch_size records. A collector thread
+    gathers the classified records and runs the output module and the
+    handler on them, either in the order they were input (ordered) or
+    as soon as they are classified.
+
+    Members
+    -------
+    meter : SMeter
+    The meter that is served. It should be trained and have its input
+    and output modules set.
+
+    n_workers : Int
+    The number of worker processes, None for one per core.
+
+    batch_size : Int
+    The number of records sent to a worker at a time.
+
+    ordered : Bool
+    Whether the records are output in the order they were input.
+
+    queue_size : Int
+    The maximum number of batches waiting for a worker. The input
+    module blocks while the queue is full.
+
+    dropped : Int
+    The number of records that were dropped because every worker had
+    stopped.
+
+    If a worker dies (it is killed or runs out of memory), the batch it
+    was classifying is lost: it is logged to the socialmeter.serving
+    logger, counted in the worker's stats and skipped, and the other
+    workers carry on. Once every worker has stopped, the records that
+    are still input are logged and dropped.
+    """
+    def __init__(self, meter, n_workers=None, batch_size=64, ordered=True,
+                 queue_size=100):
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        self.meter = meter
+        self.n_workers = n_workers
+        self.batch_size = batch_size
+        self.ordered = ordered
+        self.queue_size = queue_size
+
+        self.workers = list()
+        self.tasks = None
+        self.results = None
+        self.collector = None
+        # The seq of the batch each worker last took, and of the last
+        # batch whose result was received from it
+        self.current = None
+        self.last_done = dict()
+        self.lost = set()
+        self.batch = list()
+        self.sent = 0
+        self.received = 0
+        self.next_seq = 0
+        self.ended = False
+        self.lock = threading.Lock()
+
+        self.worker_stats = dict()
+        self.errors = 0
+        self.dropped = 0
+
+    def start(self):
+        """
+        Starts the workers and the input module of the meter, and
+        returns once the input module has finished and every record has
+        been output.
+        """
+        meter = self.meter
+        if not meter.is_ready():
+            print("Not ready to start.")
+            return
+
+        meter.set_classifier_keys()
+        # Load the models before forking so the workers share them
+        parallel.warmup(meter.extraction_plan().artifacts)
+
+        ctx = _context()
+        self.tasks = ctx.Queue(self.queue_size)
+        self.results = list()
+        self.sent = 0
+        self.received = 0
+        self.next_seq = 0
+        self.ended = False
+        self.dropped = 0
+        self.workers = list()
+        self.current = ctx.Array('q', [-1] * self.n_workers, lock=False)
+        self.last_done = dict()
+        self.lost = set()
+        for i in range(self.n_workers):
+            self.worker_stats[i] = {"records": 0, "batches": 0,
+                                    "busy_seconds": 0.0, "errors": 0,
+                                    "lost_batches": 0}
+            self.last_done[i] = -1
+            reader, writer = ctx.Pipe(duplex=False)
+            p = ctx.Process(target=_serve, name="SMeter-{}".format(i),
+                            args=(i, meter, self.tasks, writer,
+                                  self.current),
+                            daemon=True)
+            p.start()
+            # Only the worker holds the writing end, so the reader gets
+            # an EOFError once the worker has exited
+            writer.close()
+            self.workers.append(p)
+            self.results.append(reader)
+
+        self.collector = threading.Thread(target=self._collect,
+                                          name="ShardedServer", daemon=True)
+        self.collector.start()
+
+        # The handler set by set_input_mod or set_dispatcher
+        handler = meter.input_mod.handler
+        meter.input_mod.set_handler(self.submit)
+        try:
+            meter.input_mod.start()
+        finally:
+            meter.input_mod.set_handler(handler)
+            self.stop()
+
+    def stop(self):
+        """
+        Sends the records that are waiting for a full batch, and waits
+        for the workers to finish and every record to be output.
+        """
+        with self.lock:
+            if self.ended:
+                return
+            self._send()
+            self.ended = True
+        for _ in self.workers:
+            if not self._put(_END):
+                break
+        self.collector.join()
+        for p in self.workers:
+            p.join()
+
+    def submit(self, input_data):
+        """
+        Called by the input module with new input.
+        """
+        with self.lock:
+            self.batch.append(dict(input_data))
+            if len(self.batch) >= self.batch_size:
+                self._send()
+
+    def _send(self):
+        if len(self.batch) > 0:
+            if self._put((self.sent, self.batch)):
+                self.sent += 1
+            else:
+                self.dropped += len(self.batch)
+                logger.error("Every worker has stopped, %d records were "
+                             "dropped.", len(self.batch))
+            self.batch = list()
+
+    def _put(self, task):
+        """
+        Puts task on the queue of the workers, waiting while it is
+        full. Returns False if every worker has stopped, since the
+        queue would never be emptied.
+        """
+        while any(p.is_alive() for p in self.workers):
+            try:
+                self.tasks.put(task, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _collect(self):
+        from multiprocessing.connection import wait
+
+        pending = dict()
+        readers = list(self.results)
+        while True:
+            if self.ended and self.received == self.sent:
+                return
+            for reader in wait(readers, timeout=0.5):
+                if not self._receive(pending, reader):
+                    # Every copy of the worker's end has been closed
+                    readers.remove(reader)
+            self._check_workers(pending)
+
+            if not any(p.is_alive() for p in self.workers):
+                # Take the results that were sent before they exited
+                for reader in readers:
+                    while reader.poll() and self._receive(pending, reader):
+                        pass
+                self._check_workers(pending)
+                if self.ended and self.received == self.sent:
+                    return
+                logger.error("Every worker has stopped, %d batches were "
+                             "lost.", self.sent - self.received)
+                for seq in sorted(pending):
+                    self._output(pending[seq])
+                return
+
+    def _receive(self, pending, reader):
+        """
+        Receives a result from reader. Returns False if the pipe has
+        been closed.
+        """
+        try:
+            result = reader.recv()
+        except EOFError:
+            return False
+        worker_id, seq, out, elapsed, error = result
+        self.last_done[worker_id] = seq
+        if seq in self.lost:
+            # Already skipped, the worker died after sending it
+            return True
+        s = self.worker_stats[worker_id]
+        s["batches"] += 1
+        s["records"] += len(out)
+        s["busy_seconds"] += elapsed
+        if error is not None:
+            s["errors"] += 1
+            self.errors += 1
+            logger.error("Worker %d failed on a batch:\n%s",
+                         worker_id, error)
+        self._received(pending, seq, out)
+        return True
+
+    def _received(self, pending, seq, out):
+        self.received += 1
+        if not self.ordered:
+            self._output(out)
+            return
+        pending[seq] = out
+        while self.next_seq in pending:
+            self._output(pending.pop(self.next_seq))
+            self.next_seq += 1
+
+    def _check_workers(self, pending):
+        # Skip the batch of every worker that died while classifying
+        # it, so the batches after it are not held back forever
+        for i, p in enumerate(self.workers):
+            if p.is_alive() or p.exitcode in (None, 0):
+                continue
+            # Take the results the worker sent before it died first
+            reader = self.results[i]
+            while reader.poll() and self._receive(pending, reader):
+                pass
+            seq = self.current[i]
+            if seq < 0 or seq == self.last_done[i] or seq in self.lost:
+                continue
+            self.lost.add(seq)
+            self.worker_stats[i]["lost_batches"] += 1
+            logger.error("Worker %d died (exit code %d) while classifying "
+                         "batch %d, its records were lost.",
+                         i, p.exitcode, seq)
+            self._received(pending, seq, [])
+
+    def _output(self, out):
+        meter = self.meter
+        released = list()
+        if meter.released is not None:
+            # The worker released these, keep them released in the
+            # record that is rebuilt from its dict
+            released = meter.released["preprocess"] + \
+                meter.released["preclass"] + meter.released["classify"]
+        for d in out:
+            data = meter.format_input(d)
+            meter.release_columns(data, released)
+            meter.finished_classify(data)
+
+    def health(self):
+        """
+        Returns a list with the pid, whether it is alive and the exit
+        code of each worker.
+        """
+        return [{"worker": i, "pid": p.pid, "alive": p.is_alive(),
+                 "exitcode": p.exitcode}
+                for i, p in enumerate(self.workers)]
+
+    def stats(self):
+        """
+        Returns a dict of the records, batches, errors and busy time of
+        each worker, and the records per second while it was busy.
+        """
+        stats = dict()
+        for i, s in self.worker_stats.items():
+            s = dict(s)
+            rps = 0.0
+            if s["busy_seconds"] > 0:
+                rps = s["records"] / s["busy_seconds"]
+            s["records_per_second"] = rps
+            stats[i] = s
+        return stats
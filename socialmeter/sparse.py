@@ -0,0 +1,54 @@
+# sparse.py
+#
+# This file defines how rows of features that mix numbers and
+# scipy.sparse rows (such as the rows of HashedNGramFE) are turned
+# into a matrix the sklearn classifiers accept.
+
+import sys
+
+
+def issparse(value):
+    """
+    Returns whether value is a scipy.sparse matrix. scipy is only
+    checked if something has already imported it, since a sparse value
+    can only exist if it has.
+    """
+    sp = sys.modules.get("scipy.sparse")
+    return sp is not None and sp.issparse(value)
+
+
+def has_sparse(rows):
+    """
+    Returns whether rows (a list of lists of features) has a feature
+    that is a sparse row. Every row has the same extractors, so only
+    the first row is checked.
+    """
+    if issparse(rows):
+        return True
+    if len(rows) == 0:
+        return False
+    return any(issparse(f) for f in rows[0])
+
+
+def feature_matrix(rows):
+    """
+    Returns rows of features as a matrix for the classifiers. If every
+    feature is a number, rows is returned unchanged. Otherwise the
+    result is a scipy.sparse CSR matrix where each sparse feature spans
+    as many columns as it has, and every other feature spans one.
+    """
+    if issparse(rows) or not has_sparse(rows):
+        return rows
+
+    import numpy as np
+    import scipy.sparse as sp
+
+    blocks = list()
+    for j in range(len(rows[0])):
+        column = [r[j] for r in rows]
+        if issparse(column[0]):
+            blocks.append(sp.vstack(column, format="csr"))
+        else:
+            values = np.asarray(column, dtype=float).reshape((-1, 1))
+            blocks.append(sp.csr_matrix(values))
+    return sp.hstack(blocks, format="csr")
@@ -0,0 +1,139 @@
+# stats.py
+#
+# This file defines the timing and throughput statistics that the
+# SMeter and its links collect when stats are enabled.
+
+from collections import deque
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TimingStats:
+    """
+    TimingStats collects the statistics of a single stage or module:
+    the number of calls, records and errors, the total time spent and
+    the latencies of the most recent calls, which are used for the
+    percentiles.
+
+    Members
+    -------
+    window : Int
+    The number of recent latencies kept for the percentiles.
+    """
+    def __init__(self, window=1000):
+        self.window = window
+        self.calls = 0
+        self.records = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.latencies = deque(maxlen=window)
+        self.started = time.time()
+
+    def record(self, elapsed, n=1, error=False):
+        self.calls += 1
+        self.records += n
+        self.total_time += elapsed
+        self.latencies.append(elapsed)
+        if error:
+            self.errors += 1
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        wall_time = time.time() - self.started
+        s = {"calls": self.calls,
+             "records": self.records,
+             "errors": self.errors,
+             "total_seconds": self.total_time,
+             "mean_ms": 0.0,
+             "p50_ms": 0.0,
+             "p90_ms": 0.0,
+             "p99_ms": 0.0,
+             "records_per_second": 0.0}
+        if self.calls > 0:
+            s["mean_ms"] = self.total_time / self.calls * 1000
+        if len(latencies) > 0:
+            for p in (50, 90, 99):
+                i = min(len(latencies) - 1, len(latencies) * p // 100)
+                s["p{}_ms".format(p)] = latencies[i] * 1000
+        if wall_time > 0:
+            s["records_per_second"] = self.records / wall_time
+        return s
+
+
+class ChainStats:
+    """
+    ChainStats holds the TimingStats of every stage and module of an
+    SMeter, keyed by name (for example "classify" or
+    "preclass/word-count").
+
+    If log_interval is set, a line per stage is logged to the
+    socialmeter.stats logger at most every log_interval seconds.
+
+    Members
+    -------
+    window : Int
+    The number of recent latencies kept for the percentiles.
+
+    log_interval : Float
+    The number of seconds between logging the stats, or None to not
+    log them.
+    """
+    def __init__(self, window=1000, log_interval=None):
+        self.window = window
+        self.log_interval = log_interval
+        self.stats = dict()
+        self.lock = threading.Lock()
+        self.last_log = time.time()
+
+    def measure(self, name, process, data, n=1):
+        """
+        Calls process(data), records how long it took under name and
+        returns the result. n is the number of records in data.
+        """
+        start = time.perf_counter()
+        try:
+            result = process(data)
+        except Exception:
+            self._record(name, time.perf_counter() - start, n, True)
+            raise
+        self._record(name, time.perf_counter() - start, n, False)
+        return result
+
+    def snapshot(self):
+        """
+        Returns a dict of the stats of every stage and module.
+        """
+        with self.lock:
+            return {name: s.snapshot() for name, s in self.stats.items()}
+
+    def log(self):
+        for name, s in sorted(self.snapshot().items()):
+            logger.info("%s: %d records, %d errors, %.1f records/s, "
+                        "mean %.3fms, p50 %.3fms, p99 %.3fms",
+                        name, s["records"], s["errors"],
+                        s["records_per_second"], s["mean_ms"],
+                        s["p50_ms"], s["p99_ms"])
+
+    def reset(self):
+        with self.lock:
+            self.stats = dict()
+
+    def _record(self, name, elapsed, n, error):
+        should_log = False
+        with self.lock:
+            s = self.stats.get(name)
+            if s is None:
+                s = TimingStats(self.window)
+                self.stats[name] = s
+            s.record(elapsed, n, error)
+
+            if self.log_interval is not None:
+                now = time.time()
+                if now - self.last_log >= self.log_interval:
+                    self.last_log = now
+                    should_log = True
+        if should_log:
+            self.log()
@@ -0,0 +1,121 @@
+# store.py
+#
+# This file defines the on-disk store of extracted feature matrices
+# used by the SMeter to avoid re-extracting the features of a corpus.
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from socialmeter.sparse import feature_matrix, has_sparse
+
+
+class FeatureStore:
+    """
+    FeatureStore saves the feature matrix extracted from a corpus to a
+    directory, so that later training and test runs on the same corpus
+    with the same feature extractors memory-map the matrix instead of
+    extracting it again.
+
+    Each matrix is saved as a NumPy .npy file of floats (features that
+    could not be extracted are NaN), or as a scipy.sparse .npz file if
+    some extractors return sparse rows (see HashedNGramFE). The
+    directory's manifest.json lists every matrix with the keys and
+    configuration of the extractors that produced it and a hash of the
+    corpus.
+
+    Members
+    -------
+    directory : String
+    The directory the matrices and manifest are saved in.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def features_for(self, signature, keys, texts, extract):
+        """
+        Returns the feature matrix of texts for the extractors with the
+        configuration signature and feature keys. If it is not in the
+        store, extract(texts) is called to extract it and the result is
+        saved. The returned matrix is a read-only memory map, or a
+        scipy.sparse matrix for sparse features.
+        """
+        entry_id = self.entry_id(signature, texts)
+        features = self.load(entry_id)
+        if features is None:
+            self.save(entry_id, signature, keys, len(texts),
+                      extract(texts))
+            features = self.load(entry_id)
+        return features
+
+    def entry_id(self, signature, texts):
+        """
+        Returns the id of the matrix of texts for the extractors with
+        the configuration signature.
+        """
+        h = hashlib.sha1(signature.encode('utf-8'))
+        for t in texts:
+            h.update(b'\0')
+            h.update(t.encode('utf-8'))
+        return h.hexdigest()
+
+    def load(self, entry_id):
+        """
+        Memory-maps the matrix with id entry_id, or returns None if it
+        is not in the store.
+        """
+        entry = self.manifest().get(entry_id)
+        if entry is None:
+            return None
+        filename = os.path.join(self.directory, entry["file"])
+        if not os.path.exists(filename):
+            return None
+        if filename.endswith(".npz"):
+            import scipy.sparse as sp
+            return sp.load_npz(filename)
+        return np.load(filename, mmap_mode='r')
+
+    def save(self, entry_id, signature, keys, n_rows, features):
+        """
+        Saves the matrix features with id entry_id and adds it to the
+        manifest.
+        """
+        if has_sparse(features):
+            import scipy.sparse as sp
+            name = "features-{}.npz".format(entry_id)
+            tmp = os.path.join(self.directory, name + ".tmp")
+            with open(tmp, 'wb') as f:
+                sp.save_npz(f, feature_matrix(features))
+        else:
+            matrix = np.asarray(features, dtype=float)
+            if matrix.size == 0:
+                matrix = matrix.reshape((n_rows, len(keys)))
+
+            name = "features-{}.npy".format(entry_id)
+            tmp = os.path.join(self.directory, name + ".tmp")
+            with open(tmp, 'wb') as f:
+                np.save(f, matrix)
+        os.replace(tmp, os.path.join(self.directory, name))
+
+        manifest = self.manifest()
+        manifest[entry_id] = {"keys": list(keys),
+                              "signature": signature,
+                              "rows": n_rows,
+                              "file": name}
+        self._write_manifest(manifest)
+
+    def manifest(self):
+        filename = os.path.join(self.directory, "manifest.json")
+        if not os.path.exists(filename):
+            return dict()
+        with open(filename, 'r') as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        filename = os.path.join(self.directory, "manifest.json")
+        with open(filename + ".tmp", 'w') as f:
+            json.dump(manifest, f, indent=4, sort_keys=True)
+        os.replace(filename + ".tmp", filename)
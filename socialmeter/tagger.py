@@ -0,0 +1,71 @@
+# tagger.py
+#
+# This file defines the POS tagger shared by every module of the
+# process, so that the tagger model is only loaded once.
+
+import threading
+
+_tagger = None
+_lock = threading.Lock()
+
+
+def get_tagger():
+    """
+    Returns the tagger of the process, loading NLTK's PerceptronTagger
+    the first time it is needed. The tagger only reads its model while
+    tagging, so it is shared by every thread.
+    """
+    global _tagger
+    if _tagger is None:
+        with _lock:
+            if _tagger is None:
+                from nltk.tag.perceptron import PerceptronTagger
+                _tagger = PerceptronTagger()
+    return _tagger
+
+
+def set_tagger(tagger):
+    """
+    Sets the tagger used by every module. tagger should have a
+    tag(tokens) method like NLTK's taggers. None loads the
+    PerceptronTagger again when it is next needed.
+    """
+    global _tagger
+    with _lock:
+        _tagger = tagger
+
+
+def warmup():
+    """
+    Loads the tagger and tags a short sentence, so that the first text
+    the chain tags does not pay for loading the model.
+    """
+    pos_tag(["Warm", "up", "the", "tagger", "."])
+
+
+def pos_tag(tokens):
+    """
+    Tags a list of tokens, like nltk.pos_tag.
+    """
+    return get_tagger().tag(tokens)
+
+
+def pos_tag_sents(token_lists):
+    """
+    Tags each list of tokens in token_lists, like nltk.pos_tag_sents.
+    """
+    tagger = get_tagger()
+    return [tagger.tag(tokens) for tokens in token_lists]
+
+
+def tag_analyses(analyses):
+    """
+    Sets the "pos_tags" artifact of every TextAnalysis in analyses that
+    does not have it yet, tagging them all with one pos_tag_sents call.
+    """
+    untagged = [a for a in analyses if "pos_tags" not in a.artifacts]
+    if len(untagged) == 0:
+        return
+    tags = pos_tag_sents([a.get("tokens") for a in untagged])
+    for a, t in zip(untagged, tags):
+        a.set("pos_tags", t)
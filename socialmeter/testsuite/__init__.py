@@ -5,6 +5,10 @@
 #
 # Note: This is not a suite of unit tests for the accuracy
 # of the code, that is found in the root directory in 'tests'.
+#
+# The test modules are imported when they are first used, so that
+# importing this package does not import sklearn.
+
+from ..lazy import lazy_module
 
-from . import grid_search
-from . import kfold
+lazy_module(globals(), {}, modules=("grid_search", "kfold"))
@@ -3,6 +3,8 @@
 from sklearn.model_selection import cross_val_score
 import numpy as np
 
+from ..sparse import issparse
+
 
 class ValidationTest():
     def __init__(self):
@@ -63,12 +65,10 @@ class KFoldValidationTest(ValidationTest):
         sentiments = data[1]
 
         # Extract the features using the meter's built in function
-        # extract_features.
-        features = list()
-        for t in texts:
-            t_features = np.asarray(meter.extract_single_features(t))
-            features.append(t_features)
-        features = np.asarray(features)
+        # extract_features. Sparse features are already a matrix.
+        features = meter.extract_features(texts)
+        if not issparse(features):
+            features = np.asarray(features)
 
         # Run the cross validation on the chain
         classifier = meter.class_mod.classifier
@@ -0,0 +1,95 @@
+# tokenizers.py
+#
+# This file defines the tokenizers that the "tokens" artifact of a
+# TextAnalysis can use, and the default one of the process.
+
+import re
+
+from socialmeter.entities import EMOTICON_PATTERN
+
+
+class NLTKTokenizer:
+    """
+    NLTKTokenizer tokenizes with nltk.word_tokenize, which splits the
+    text into sentences with punkt and each sentence with the Treebank
+    rules. This is the default tokenizer.
+    """
+    name = "nltk"
+
+    def tokenize(self, text):
+        import nltk
+        return nltk.word_tokenize(text)
+
+
+# The tokens of RegexTokenizer, in order of precedence
+TOKEN_REGEX = re.compile(r"""
+    (?:https?://|www\.)\S+                  # URLs
+  | {}                                      # emoticons and hearts
+  | [@\#]\w+                                # mentions and hashtags
+  | \d+(?:[.,:]\d+)+                        # numbers, times and dates
+  | \w+(?=n't\b)                            # "do" of "don't", "ca" of "can't"
+  | n't\b                                   # the "n't" of a contraction
+  | can(?=not\b)                            # "can" of "cannot"
+  | '(?:s|m|d|ll|re|ve)\b                   # other clitics, such as "'s"
+  | \w+(?:-\w+)*                            # words, with hyphens
+  | \.\.\.?                                 # ellipses
+  | \S                                      # any other character
+""".format(EMOTICON_PATTERN), re.VERBOSE | re.IGNORECASE)
+
+
+class RegexTokenizer:
+    """
+    RegexTokenizer tokenizes a text with a single precompiled regular
+    expression, which is much faster than nltk.word_tokenize.
+
+    Words, punctuation and contractions ("do", "n't", "can", "not") are
+    split the way word_tokenize splits them, so the extractors that
+    count adjectives, negations and punctuation runs work the same.
+    Unlike word_tokenize, hashtags, mentions, URLs and emoticons are
+    each kept as one token, quotes are not converted to `` and '', and
+    colloquial contractions such as "gonna" and "wanna" are not split.
+    """
+    name = "regex"
+
+    def tokenize(self, text):
+        return TOKEN_REGEX.findall(text)
+
+
+TOKENIZERS = {
+    "nltk": NLTKTokenizer,
+    "regex": RegexTokenizer,
+}
+
+_default = NLTKTokenizer()
+
+
+def tokenizer_for(tokenizer):
+    """
+    Returns the tokenizer object for tokenizer, which is a tokenizer,
+    the name of one in TOKENIZERS, or None for the default tokenizer.
+    """
+    if tokenizer is None:
+        return _default
+    if isinstance(tokenizer, str):
+        if tokenizer not in TOKENIZERS:
+            raise ValueError("Unknown tokenizer \"{}\", the tokenizers are "
+                             "{}.".format(tokenizer, sorted(TOKENIZERS)))
+        return TOKENIZERS[tokenizer]()
+    return tokenizer
+
+
+def get_tokenizer():
+    return _default
+
+
+def set_tokenizer(tokenizer):
+    """
+    Sets the default tokenizer of the process, which is used by every
+    TextAnalysis that is not given a tokenizer. tokenizer is a
+    tokenizer or the name of one in TOKENIZERS.
+    """
+    global _default
+    if tokenizer is None:
+        _default = NLTKTokenizer()
+    else:
+        _default = tokenizer_for(tokenizer)
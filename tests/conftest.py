@@ -0,0 +1,42 @@
+# tests/conftest.py
+
+import pytest
+
+import socialmeter as sm
+
+from socialmeter import preprocess as pp
+
+from tests.helpers import (ListInputModule, create_meter, make_inputs,
+                           training_data)
+
+
+@pytest.fixture
+def meter():
+    """
+    A meter trained on training_data.
+    """
+    return create_meter()
+
+
+@pytest.fixture
+def stream():
+    """
+    Returns a function that sets up a trained meter to stream the
+    training texts repeated `repeat` times (or `texts`) through a
+    ListInputModule, with a stop words preprocessor if stop_words.
+    The function returns the meter, the inputs and the list the
+    handler appends the results to.
+    """
+    def setup(repeat=5, texts=None, stop_words=True):
+        meter = create_meter()
+        if stop_words:
+            meter.add_preprocess_mod(sm.PreprocessorExtractorModule(
+                pp.StopWordsPreprocessor()))
+        if texts is None:
+            texts = training_data()[0] * repeat
+        inputs = make_inputs(texts)
+        meter.set_input_mod(ListInputModule(inputs))
+        results = list()
+        meter.set_handler(results.append)
+        return meter, inputs, results
+    return setup
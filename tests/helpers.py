@@ -0,0 +1,61 @@
+# tests/helpers.py
+#
+# The meter, inputs and fakes shared by the tests.
+
+import socialmeter as sm
+
+from socialmeter import preclass as pc
+from socialmeter import classif as cl
+from socialmeter import output as out
+
+
+class ListInputModule(sm.chain_links.InputModule):
+    """
+    Feeds a list of inputs to the meter when started.
+    """
+    def __init__(self, inputs):
+        self.inputs = inputs
+
+    def start(self):
+        for i in self.inputs:
+            self.handler(i)
+
+
+class FakeTagger:
+    """
+    Tags "funny" as an adjective and everything else as a noun.
+    """
+    def __init__(self, calls):
+        self.calls = calls
+
+    def tag(self, tokens):
+        self.calls["tag"] += 1
+        return [(t, "JJ" if t == "funny" else "NN") for t in tokens]
+
+
+def training_data():
+    texts = ["THIS IS GREAT #yes", "this is bad", "SO #very #GOOD",
+             "not good at all", "LOVE IT #fun #wow", "meh whatever"]
+    sentiments = ["1", "0", "1", "0", "1", "0"]
+    return (texts, sentiments)
+
+
+def create_meter():
+    meter = sm.SMeter()
+    meter.set_column_format(["username", "text", "classification"])
+    meter.add_preclass_mod(sm.FeatureExtractorModule(
+        pc.ExcessiveCapitalsFE()))
+    meter.add_preclass_mod(sm.FeatureExtractorModule(
+        pc.HashtagCountFE()))
+    meter.set_class_mod(cl.DecisionTreeModule())
+    meter.set_output_mod(out.OutputModule())
+    meter.train(training_data())
+    return meter
+
+
+def make_inputs(texts):
+    """
+    Returns an input dict for each text, from the users u0, u1, ...
+    """
+    return [{"text": t, "username": "u{}".format(i)}
+            for i, t in enumerate(texts)]
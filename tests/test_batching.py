@@ -0,0 +1,76 @@
+# tests/test_batching.py
+
+import time
+
+from socialmeter import classif as cl
+from socialmeter.batching import MicroBatcher
+
+
+def wait_for(results, n):
+    for _ in range(200):
+        if len(results) >= n:
+            return
+        time.sleep(0.01)
+
+
+def test_micro_batcher(stream):
+    meter, inputs, results = stream(repeat=2)
+    meter.set_micro_batcher(MicroBatcher(max_batch=5, max_delay_ms=10000))
+    meter.start_if_ready()
+
+    assert [r["username"] for r in results] == \
+        [i["username"] for i in inputs]
+    assert [r["classification"] for r in results] == \
+        list(meter.classify_many([i["text"] for i in inputs]))
+    assert meter.micro_batcher.stats()["batches"] == 3
+
+
+def test_micro_batcher_deadline(meter):
+    meter.set_classifier_keys()
+    results = list()
+    meter.set_handler(results.append)
+    batcher = MicroBatcher(max_batch=100, max_delay_ms=5,
+                           target_p99_ms=1000)
+    meter.set_micro_batcher(batcher)
+    batcher.start(meter)
+
+    meter.new_input({"text": "THIS IS GREAT #yes"})
+    wait_for(results, 1)
+    batcher.stop()
+
+    assert len(results) == 1 and batcher.stats()["batches"] == 1
+
+
+def test_micro_batcher_errors(meter):
+    class FlakyClassifier(cl.DecisionTreeModule):
+        """
+        Fails on every batch, and on the records of user u1.
+        """
+        def process_batch(self, datas):
+            raise ValueError("Failed on a batch")
+
+        def process(self, data):
+            if data["username"] == "u1":
+                raise ValueError("Failed on u1")
+            return super().process(data)
+
+    flaky = FlakyClassifier()
+    flaky.classifier = meter.class_mod.classifier
+    meter.set_class_mod(flaky)
+    meter.set_classifier_keys()
+    results = list()
+    meter.set_handler(results.append)
+    batcher = MicroBatcher(max_batch=100, max_delay_ms=5)
+    meter.set_micro_batcher(batcher)
+    batcher.start(meter)
+
+    for i in range(3):
+        meter.new_input({"text": "so #good", "username": "u{}".format(i)})
+    wait_for(results, 2)
+    # The deadline thread survived the failure and flushes new records
+    meter.new_input({"text": "so #good", "username": "u3"})
+    wait_for(results, 3)
+    batcher.stop()
+
+    assert [r["username"] for r in results] == ["u0", "u2", "u3"]
+    assert batcher.stats()["errors"] == 1
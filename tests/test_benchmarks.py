@@ -0,0 +1,25 @@
+# tests/test_benchmarks.py
+
+import json
+
+from benchmarks import run
+from benchmarks.corpus import corpus
+
+
+def test_corpus_is_deterministic():
+    assert corpus(50, seed=3) == corpus(50, seed=3)
+    assert corpus(50, seed=3) != corpus(50, seed=4)
+
+
+def test_run():
+    results = run.run(n_records=40)
+    json.dumps(results)
+
+    for section in ["tokenizers", "preprocess", "preclass", "classif", "output",
+                    "chains"]:
+        assert len(results[section]) > 0
+    assert results["preclass"]["HashtagCountFE"]["records"] == 40
+    assert results["tokenizers"]["regex"]["records"] == 40
+    assert "train" in results["classif"]["DecisionTreeModule"]
+    assert "stream" in results["chains"]["no_nltk"]
+    assert "nltk_regex_tokenizer" in results["chains"]
@@ -0,0 +1,44 @@
+# tests/test_cache.py
+
+from socialmeter import tokenizers
+from socialmeter.cache import FeatureCache
+
+from tests.helpers import training_data
+
+
+def test_feature_cache(meter, tmpdir):
+    texts = training_data()[0] * 3
+    expected = meter.extract_features(texts)
+
+    filename = str(tmpdir.join("features.db"))
+    meter.set_feature_cache(FeatureCache(max_entries=4, filename=filename))
+    features = meter.extract_features(texts)
+    stats = meter.feature_cache.stats()
+
+    assert features == expected
+    assert stats["entries"] == 4 and stats["evictions"] == 2
+    assert meter.extract_single_features(texts[-1]) == expected[-1]
+    meter.feature_cache.close()
+
+    # A new cache on the same file starts with every vector
+    meter.set_feature_cache(FeatureCache(filename=filename))
+    assert meter.extract_features(texts) == expected
+    assert meter.feature_cache.stats()["misses"] == 0
+
+
+def test_feature_cache_default_tokenizer(meter):
+    texts = training_data()[0]
+    meter.set_feature_cache(FeatureCache())
+    meter.extract_features(texts)
+    assert meter.feature_cache.stats()["misses"] == len(texts)
+
+    # The features cached for another default tokenizer are not used
+    tokenizers.set_tokenizer("regex")
+    try:
+        meter.extract_features(texts)
+    finally:
+        tokenizers.set_tokenizer(None)
+    assert meter.feature_cache.stats()["misses"] == 2 * len(texts)
+
+    meter.extract_features(texts)
+    assert meter.feature_cache.stats()["misses"] == 2 * len(texts)
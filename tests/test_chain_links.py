@@ -0,0 +1,234 @@
+# tests/test_chain_links.py
+
+import socialmeter as sm
+
+from socialmeter import preprocess as pp
+from socialmeter import preclass as pc
+
+from tests.helpers import FakeTagger, make_inputs, training_data
+
+
+def test_process_batch(meter):
+    inputs = make_inputs(training_data()[0])
+
+    results = meter.process_batch(inputs)
+    errors = list()
+
+    if len(results) != len(inputs):
+        errors.append("Expected {} results, found {}."
+                      .format(len(inputs), len(results)))
+    for i, r in enumerate(results):
+        if r["username"] != "u{}".format(i):
+            errors.append("Result {} is out of order.".format(i))
+        if r["classification"] != training_data()[1][i]:
+            errors.append("Misclassified training text \"{}\"."
+                          .format(r["text"]))
+
+    assert not errors, "Errors occured:\n{}".format("\n".join(errors))
+
+
+def test_process_batch_matches_stream(meter):
+    texts = training_data()[0]
+
+    streamed = list()
+    meter.set_handler(streamed.append)
+    meter.set_classifier_keys()
+    for t in texts:
+        meter.new_input({"text": t})
+
+    batched = meter.process_batch([{"text": t} for t in texts])
+    many = list(meter.classify_many(texts))
+
+    assert [d["classification"] for d in streamed] == \
+        [d["classification"] for d in batched] == many
+
+
+def test_record():
+    index = {"text": 0, "classification": 1}
+    r = sm.Record(index, ["Some text", None])
+    errors = list()
+
+    r["classification"] = "1"
+    r["extra"] = 5
+
+    if r["text"] != "Some text" or r["classification"] != "1":
+        errors.append("Record returned the wrong values.")
+    if "extra" not in r or r["extra"] != 5:
+        errors.append("Record lost a key outside of the column format.")
+    if r.keys() != ["text", "classification", "extra"]:
+        errors.append("Record keys are out of order: {}.".format(r.keys()))
+    if r.to_dict() != {"text": "Some text", "classification": "1",
+                       "extra": 5}:
+        errors.append("Record converted to the wrong dict.")
+    if r.get("missing", 0) != 0:
+        errors.append("Record did not return the default value.")
+
+    assert not errors, "Errors occured:\n{}".format("\n".join(errors))
+
+
+def test_shared_analysis(monkeypatch):
+    import nltk
+    from socialmeter import tagger
+
+    calls = {"tokenize": 0, "tag": 0}
+
+    def word_tokenize(text):
+        calls["tokenize"] += 1
+        return text.split(" ")
+
+    monkeypatch.setattr(nltk, "word_tokenize", word_tokenize)
+    monkeypatch.setattr(tagger, "_tagger", FakeTagger(calls))
+
+    meter = sm.SMeter()
+    meter.set_column_format(["text", "classification"])
+    for fe in [pc.AdjectiveCounterFE(), pc.WordCountFE(),
+               pc.ExcessivePunctuationFE(), pc.NegativeInfluenceFE()]:
+        meter.add_preclass_mod(sm.FeatureExtractorModule(fe))
+
+    features = meter.extract_single_features("a funny test")
+    record = meter.format_input({"text": "a funny test"})
+    meter.preclass_link.process(record)
+
+    assert features == [1, 3, 0, 0]
+    assert [record[m.key] for m in meter.preclass_link.mods] == features
+    assert calls == {"tokenize": 2, "tag": 2}
+
+
+def test_parallel_extract_features(meter):
+    texts = training_data()[0] * 4
+
+    serial = meter.extract_features(texts)
+    meter.set_parallelism(2, chunk_size=5)
+    parallel = meter.extract_features(texts)
+
+    assert parallel == serial
+
+
+def test_stats(meter):
+    meter.set_handler(lambda data: None)
+    meter.set_classifier_keys()
+    meter.enable_stats()
+
+    for t in training_data()[0]:
+        meter.new_input({"text": t})
+    meter.process_batch([{"text": t} for t in training_data()[0]])
+
+    n = len(training_data()[0])
+    stats = meter.stats_snapshot()
+    errors = list()
+    for name in ["preprocess", "preclass", "classify", "output",
+                 "preclass/excessive-caps", "preclass/hashtag-count"]:
+        if name not in stats:
+            errors.append("Missing stats for {}.".format(name))
+        elif stats[name]["records"] != 2 * n:
+            errors.append("{} counted {} records, expected {}.".format(
+                name, stats[name]["records"], 2 * n))
+    if stats["classify"]["calls"] != n + 1:
+        errors.append("Classify counted {} calls, expected {}.".format(
+            stats["classify"]["calls"], n + 1))
+
+    meter.disable_stats()
+    assert meter.stats_snapshot() is None
+    assert not errors, "Errors occured:\n{}".format("\n".join(errors))
+
+
+def test_extraction_plan(meter):
+    from socialmeter.analysis import ExtractionPlan
+    from socialmeter.chain_links import FeatureExtractor
+
+    plan = ExtractionPlan([pc.NegativeInfluenceFE(), pc.HashtagCountFE(),
+                           pc.WordCountFE()])
+    assert plan.artifacts == ["tokens", "lower_tokens", "entities",
+                              "hashtags", "pos_tags"]
+    assert ExtractionPlan([pc.ExcessiveCapitalsFE()]).artifacts == ["words"]
+
+    class UnknownFE(FeatureExtractor):
+        requires = ("sarcasm",)
+
+    meter.add_preclass_mod(sm.FeatureExtractorModule(UnknownFE()))
+    try:
+        meter.extraction_plan()
+        assert False, "An unknown artifact did not raise an error."
+    except ValueError:
+        pass
+
+
+def test_hashtag_preprocessor():
+    ht = pp.HashtagPreprocessor()
+    assert ht.extract("I am #funny, #notfunny") == \
+        "I am HT_FUNNY, HT_NOTFUNNY"
+    assert ht.extract("#start is not matched") == "#start is not matched"
+
+
+def test_save_load(meter, tmpdir):
+    meter.enable_stats()
+    filename = str(tmpdir.join("meter.pickle"))
+    meter.save(filename)
+
+    loaded = sm.SMeter.load(filename)
+    texts = training_data()[0]
+
+    assert loaded.output_mod is None and loaded.stats is None
+    assert loaded.column_format == meter.column_format
+    assert list(loaded.classify_many(texts)) == \
+        list(meter.classify_many(texts))
+
+
+def test_record_release():
+    record = sm.Record({"a": 0, "b": 1}, [1, 2])
+    record["c"] = 3
+    record.release("a")
+    record.release("c")
+
+    assert "a" not in record and "c" not in record
+    assert record.get("a") is None
+    assert record.keys() == ["b"] and len(record) == 1
+    assert record.to_dict() == {"b": 2}
+    record["a"] = 4
+    assert record["a"] == 4
+
+
+def test_output_columns(meter):
+    seen = list()
+
+    class SpyFE(pc.HashtagCountFE):
+        def extract_analysis(self, analysis):
+            seen.append(analysis.text)
+            return super().extract_analysis(analysis)
+
+    class SpyModule(sm.FeatureExtractorModule):
+        def process(self, data):
+            seen.append(sorted(data.keys()))
+            return super().process(data)
+
+    meter.set_column_format(["username", "location", "text",
+                             "classification"])
+    meter.add_preprocess_mod(sm.PreprocessorExtractorModule(
+        pp.StopWordsPreprocessor()))
+    spy = SpyModule(SpyFE())
+    spy.set_key("spy")
+    meter.add_preclass_mod(spy)
+    meter.train(training_data())
+    meter.set_output_columns(["username", "classification"])
+    results = list()
+    meter.set_handler(results.append)
+    meter.set_classifier_keys()
+
+    assert meter.released["input"] == ["location"]
+    assert meter.released["preprocess"] == ["stop-words"]
+    assert set(meter.released["preclass"]) == {"text"}
+
+    del seen[:]
+    meter.new_input({"text": "SO #very #GOOD", "username": "u",
+                     "location": "here"})
+    # The stop words and location are released before the preclass
+    # modules run, the text after them
+    assert "stop-words" not in seen[0] and "location" not in seen[0]
+    assert seen[1] == "SO #very #GOOD"
+    # OutputModule fills in a missing text
+    assert set(results[0].keys()) == {"username", "classification", "text"}
+    assert results[0]["text"] == "(text not found)"
+
+    batched = meter.process_batch([{"text": "SO #very #GOOD",
+                                    "username": "u"}])
+    assert batched == results
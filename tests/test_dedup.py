@@ -0,0 +1,32 @@
+# tests/test_dedup.py
+
+from socialmeter.dedup import NearDuplicateIndex, normalize
+
+
+def test_normalize():
+    assert normalize("RT @someone: Great  game http://t.co/abc") == \
+        "great game"
+
+
+def test_near_duplicates(meter):
+    meter.set_classifier_keys()
+    index = NearDuplicateIndex(max_entries=2)
+    meter.set_dedup_index(index)
+    results = list()
+    meter.set_handler(results.append)
+
+    text = "LOVE this new phone so much #happy #fun"
+    meter.new_input({"text": text})
+    meter.new_input({"text": "RT @fan: " + text + " http://t.co/x1"})
+    meter.new_input({"text": "this is bad, nothing like the other one"})
+
+    assert index.stats()["hits"] == 1
+    assert results[1]["classification"] == results[0]["classification"]
+    assert results[1]["hashtag-count"] == results[0]["hashtag-count"]
+    assert index.stats()["entries"] == 2
+
+    # The first text is forgotten once a third is remembered
+    meter.new_input({"text": "something new entirely, again"})
+    meter.new_input({"text": text})
+    assert index.stats()["hits"] == 1
+    assert index.stats()["hit_rate"] == 0.2
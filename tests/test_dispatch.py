@@ -0,0 +1,51 @@
+# tests/test_dispatch.py
+
+import queue
+
+from socialmeter.dispatch import InputDispatcher
+
+
+def test_dispatcher(stream):
+    meter, inputs, results = stream()
+    meter.set_dispatcher(InputDispatcher(n_workers=3, queue_size=4))
+    meter.start_if_ready()
+
+    stats = meter.dispatcher.stats()
+    assert sorted(r["username"] for r in results) == \
+        sorted(i["username"] for i in inputs)
+    assert stats["submitted"] == stats["processed"] == len(inputs)
+    assert stats["dropped"] == 0 and stats["queue_depth"] == 0
+
+
+def test_dispatcher_drop_policy():
+    newest = InputDispatcher(queue_size=2, policy="drop-newest")
+    oldest = InputDispatcher(queue_size=2, policy="drop-oldest")
+    for i in range(5):
+        newest.submit(i)
+        oldest.submit(i)
+
+    assert newest.stats()["dropped"] == oldest.stats()["dropped"] == 3
+    assert list(newest.queue.queue) == [0, 1]
+    assert list(oldest.queue.queue) == [3, 4]
+
+
+class RefillingQueue(queue.Queue):
+    """
+    Another input thread refills the queue as soon as the oldest input
+    has been evicted.
+    """
+    def get_nowait(self):
+        data = super().get_nowait()
+        self.put_nowait("other")
+        return data
+
+
+def test_dispatcher_drop_oldest_race():
+    d = InputDispatcher(queue_size=1, policy="drop-oldest")
+    d.queue = RefillingQueue(1)
+    d.submit(0)
+    d.submit(1)
+
+    # Both 0 and 1 were lost
+    assert list(d.queue.queue) == ["other"]
+    assert d.stats()["dropped"] == 2
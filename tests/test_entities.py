@@ -0,0 +1,41 @@
+# tests/test_entities.py
+
+import io
+import re
+
+from socialmeter import entities
+from socialmeter import preprocess as pp
+from socialmeter import preclass as pc
+
+
+def test_entities():
+    text = "RT @bob: so fun!!! #win :) see http://t.co/x#y ok :Dog"
+    assert entities.scan(text) == [
+        ("mention", 3, 7, "@bob"), ("punctuation", 15, 18, "!!!"),
+        ("hashtag", 19, 23, "#win"), ("emoticon", 24, 26, ":)"),
+        ("url", 31, 46, "http://t.co/x#y")]
+
+    # The hashtags are the ones the original expression matched
+    old = re.compile(r'\W(\#[a-zA-Z]+)')
+    for t in ["#start #a##b x#c (#d)", "!!#e #f1 # g"]:
+        assert pc.HashtagCountFE().extract(t) == len(old.findall(t))
+
+    assert pp.MentionPreprocessor().extract("hi @Bob and @al!") == \
+        "hi MN_BOB and MN_AL!"
+
+    lexicon = ":)\t1\n:(\t-1\nxD\t1\n"
+    emo = pc.EmoticonSentimentFE()
+    signature = emo.signature()
+    emo.set_file(io.StringIO(lexicon))
+    assert emo.signature() != signature
+    # Only a text that is an emoticon is looked up by default
+    assert emo.extract("xD") == 1
+    assert emo.extract("great day :) :)") == 0
+
+    scan = pc.EmoticonSentimentFE(scan=True)
+    scan.set_file(io.StringIO(lexicon))
+    assert scan.signature() != emo.signature()
+    assert scan.extract("xD") == 1
+    assert scan.extract("great day :) :)") == 1
+    assert scan.extract("bad :( day :) :(") == -1
+    assert scan.extract("nothing here") == 0
@@ -197,3 +197,35 @@ def test_word_count():
         errors.append("Error counting 6 words. Returned {}.".format(t3r))
 
     assert not errors, "Errors occured:\n{}".format("\n".join(errors))
+
+
+def test_discretize():
+    from socialmeter.chain_links import FeatureExtractor
+
+    def walk_formats(fe, value):
+        # The discretization before formats were compiled
+        for i, f in enumerate(fe.discrete_format):
+            if fe._compare_discrete_f(f, value) is not None:
+                return fe.discrete_values[i]
+        return None
+
+    formats = [(["0_0", "1_2", "2<"], [0, 1, 2]),
+               (["0.0_0.5", "0.5<"], [0, 1]),
+               (["0.0-0.2", "0.2_0.4", "5.0>", "0.4<"], ["a", "b", "c", "d"])]
+    values = [-1, 0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.7, 1, 1.5, 2, 2.5, 5, 6]
+    errors = list()
+
+    for (d_format, d_values) in formats:
+        fe = FeatureExtractor()
+        fe.set_discrete_format(d_format, d_values)
+        arr = fe.discretize_array(values)
+        for i, v in enumerate(values):
+            expected = walk_formats(fe, v)
+            if fe.discretize_result(v) != expected:
+                errors.append("{} discretized {} to {}, expected {}.".format(
+                    d_format, v, fe.discretize_result(v), expected))
+            if arr[i] != expected:
+                errors.append("{} array discretized {} to {}, expected \
+{}.".format(d_format, v, arr[i], expected))
+
+    assert not errors, "Errors occured:\n{}".format("\n".join(errors))
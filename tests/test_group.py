@@ -0,0 +1,89 @@
+# tests/test_group.py
+
+import socialmeter as sm
+
+from socialmeter import preclass as pc
+from socialmeter import classif as cl
+from socialmeter import output as out
+
+from tests.helpers import ListInputModule, make_inputs, training_data
+
+
+def test_meter_group():
+    calls = list()
+
+    class CountingCapsFE(pc.ExcessiveCapitalsFE):
+        def extract_analysis(self, analysis):
+            calls.append(analysis.text)
+            return super().extract_analysis(analysis)
+
+    caps = sm.FeatureExtractorModule(CountingCapsFE())
+    meters = list()
+    for c in [cl.DecisionTreeModule, cl.MultinomialNBModule]:
+        m = sm.SMeter()
+        m.set_column_format(["username", "classification"])
+        m.add_preclass_mod(caps)
+        # A separate module with the same extractor is shared too
+        m.add_preclass_mod(sm.FeatureExtractorModule(pc.HashtagCountFE()))
+        m.set_class_mod(c())
+        meters.append(m)
+
+    group = sm.MeterGroup(meters)
+    assert len(group.preclass_mods) == 2
+
+    texts = training_data()[0]
+    group.train(training_data())
+    assert len(calls) == len(texts)
+
+    group.set_output_mod(out.OutputModule())
+    results = list()
+    group.set_handler(lambda meter, data: results.append(
+        (meters.index(meter), data["username"], data["classification"])))
+    group.set_input_mod(ListInputModule(make_inputs(texts)))
+    del calls[:]
+    group.start_if_ready()
+
+    assert len(calls) == len(texts)
+    expected = list()
+    for i, t in enumerate(texts):
+        for j, m in enumerate(meters):
+            expected.append((j, "u{}".format(i),
+                             m.classify_many([t])[0]))
+    assert results == expected
+    assert [list(c) for c in group.classify_many(texts)] == \
+        [list(m.classify_many(texts)) for m in meters]
+
+
+def test_meter_group_checks_meters():
+    caps = sm.SMeter()
+    caps.add_preclass_mod(sm.FeatureExtractorModule(
+        pc.ExcessiveCapitalsFE()))
+    group = sm.MeterGroup([caps])
+
+    # The same key for a different feature would overwrite it
+    hashtags = sm.SMeter()
+    mod = sm.FeatureExtractorModule(pc.HashtagCountFE())
+    mod.set_key(caps.preclass_link.mods[0].key)
+    hashtags.add_preclass_mod(mod)
+    try:
+        group.add_meter(hashtags)
+        assert False, "A key collision did not raise an error."
+    except ValueError:
+        pass
+    assert group.meters == [caps] and len(group.preclass_mods) == 1
+
+    regex = sm.SMeter()
+    regex.set_tokenizer("regex")
+    regex.add_preclass_mod(sm.FeatureExtractorModule(
+        pc.NegativeInfluenceFE()))
+    try:
+        group.add_meter(regex)
+        assert False, "A different tokenizer did not raise an error."
+    except ValueError:
+        pass
+
+    # The texts are tokenized with the meters' tokenizer, which splits
+    # "n't" off
+    group = sm.MeterGroup([regex])
+    assert group.extract_features(["it isn't bad"]) == \
+        {"negative-influence": [1]}
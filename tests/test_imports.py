@@ -0,0 +1,60 @@
+# tests/test_imports.py
+
+import subprocess
+import sys
+
+# Importing every package should take less than this many seconds
+IMPORT_BUDGET = 0.5
+
+HEAVY_MODULES = ["nltk", "numpy", "pandas", "sklearn", "scipy",
+                 "tweepy", "facebook"]
+
+
+def test_import_budget():
+    code = """
+import sys
+import time
+start = time.perf_counter()
+import socialmeter
+import socialmeter.classif
+import socialmeter.inputs
+import socialmeter.output
+import socialmeter.preclass
+import socialmeter.preprocess
+import socialmeter.testsuite
+elapsed = time.perf_counter() - start
+heavy = [m for m in {} if m in sys.modules]
+print(elapsed)
+print(",".join(heavy))
+""".format(HEAVY_MODULES)
+    out = subprocess.check_output([sys.executable, "-c", code],
+                                  universal_newlines=True)
+    lines = out.split("\n")
+    elapsed = float(lines[0])
+    heavy = lines[1]
+
+    assert heavy == "", "Importing socialmeter imported {}.".format(heavy)
+    assert elapsed < IMPORT_BUDGET, "Importing socialmeter took {}s, \
+the budget is {}s.".format(elapsed, IMPORT_BUDGET)
+
+
+def test_lazy_exports():
+    import socialmeter as sm
+    import socialmeter.classif as cl
+    from socialmeter.testsuite import kfold
+
+    assert cl.DecisionTreeModule.__name__ == "DecisionTreeModule"
+    assert sm.KFoldValidationTest is kfold.KFoldValidationTest
+
+
+def test_lazy_exports_without_pep_562():
+    # A module level __getattr__ is ignored before Python 3.7, so the
+    # lazy names must not depend on one
+    import socialmeter as sm
+    import socialmeter.classif as cl
+    import socialmeter.inputs as inputs
+    import socialmeter.testsuite as testsuite
+
+    for package in (sm, cl, inputs, testsuite):
+        assert "__getattr__" not in vars(package)
+    assert testsuite.kfold.KFoldValidationTest is sm.KFoldValidationTest
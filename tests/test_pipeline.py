@@ -0,0 +1,89 @@
+# tests/test_pipeline.py
+
+import socialmeter as sm
+
+from socialmeter import preprocess as pp
+from socialmeter import preclass as pc
+from socialmeter import output as out
+from socialmeter.classif.base import ClassifierModule
+from socialmeter.dispatch import InputDispatcher
+
+from tests.helpers import ListInputModule, make_inputs, training_data
+
+
+class FailingOutputModule(out.OutputModule):
+    """
+    Fails on every record whose username is in fail_on.
+    """
+    def __init__(self, fail_on):
+        super().__init__()
+        self.fail_on = fail_on
+
+    def process(self, data):
+        if data["username"] in self.fail_on:
+            raise ValueError("Failed on {}".format(data["username"]))
+        return super().process(data)
+
+
+class CapitalsClassifierModule(ClassifierModule):
+    """
+    Classifies texts with excessive capitals as "1", without sklearn.
+    """
+    def process(self, data):
+        data["classification"] = "1" if data["excessive-caps"] else "0"
+        return data
+
+
+def test_start_async(stream):
+    meter, inputs, results = stream()
+    meter.start_async_if_ready(queue_size=2)
+
+    assert [r["username"] for r in results] == \
+        [i["username"] for i in inputs]
+    assert [r["classification"] for r in results] == \
+        list(meter.classify_many([i["text"] for i in inputs]))
+
+
+def test_start_async_failing_stage(stream):
+    meter, inputs, results = stream()
+    meter.set_output_mod(FailingOutputModule({"u1"}))
+    # The queues are much smaller than the input, so a stage that died
+    # on u1 would block the input forever
+    pipeline = meter.start_async_if_ready(queue_size=2)
+
+    assert pipeline.errors == 1
+    assert [r["username"] for r in results] == \
+        [i["username"] for i in inputs if i["username"] != "u1"]
+
+
+def test_start_async_keeps_handler(stream):
+    meter, inputs, results = stream()
+    dispatcher = InputDispatcher(n_workers=2)
+    meter.set_dispatcher(dispatcher)
+    meter.start_async_if_ready(queue_size=2)
+
+    assert len(results) == len(inputs)
+    assert meter.input_mod.handler == dispatcher.submit
+
+
+def test_start_async_without_sklearn():
+    # Runs on every supported Python, including 3.6 where asyncio has
+    # no get_running_loop or run
+    meter = sm.SMeter()
+    meter.set_column_format(["username", "text", "classification"])
+    meter.add_preprocess_mod(sm.PreprocessorExtractorModule(
+        pp.HashtagPreprocessor()))
+    meter.add_preclass_mod(sm.FeatureExtractorModule(
+        pc.ExcessiveCapitalsFE()))
+    meter.set_class_mod(CapitalsClassifierModule())
+    meter.set_output_mod(out.OutputModule())
+    inputs = make_inputs(training_data()[0])
+    meter.set_input_mod(ListInputModule(inputs))
+    results = list()
+    meter.set_handler(results.append)
+
+    pipeline = meter.start_async_if_ready(queue_size=2)
+
+    assert pipeline.errors == 0
+    assert [r["classification"] for r in results] == training_data()[1]
+    assert meter.input_mod.handler == meter.new_input
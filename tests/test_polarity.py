@@ -0,0 +1,60 @@
+# tests/test_polarity.py
+
+import nltk
+
+from socialmeter import preclass as pc
+from socialmeter import polarity, tagger
+
+from tests.helpers import FakeTagger
+
+
+def test_polarity_table(tmpdir, monkeypatch):
+    looked_up = []
+
+    def fake_polarity(word):
+        looked_up.append(word)
+        return {"funny": polarity.POSITIVE,
+                "dull": polarity.NEGATIVE}.get(word, polarity.UNKNOWN)
+
+    monkeypatch.setattr(polarity, "sentiwordnet_polarity", fake_polarity)
+    monkeypatch.setattr(nltk, "word_tokenize", lambda text: text.split(" "))
+    monkeypatch.setattr(tagger, "_tagger", FakeTagger({"tag": 0}))
+
+    table = polarity.PolarityTable()
+    for w in ["Funny", "funny", "dull", "zzz", "zzz"]:
+        table.polarity(w)
+    # Every word, the unknown one too, is looked up once
+    assert looked_up == ["funny", "dull", "zzz"]
+
+    fe = pc.AdjectiveRatioFE()
+    fe.discrete_format = None
+    fe.set_polarity_table(table)
+    assert fe.extract("a funny test") == 1.0
+    assert looked_up == ["funny", "dull", "zzz"]
+
+    filename = str(tmpdir.join("polarity.npy"))
+    table.save(filename)
+    fe.set_polarity_table(filename)
+    loaded = fe.polarity_table
+    assert loaded.table.dtype == polarity.TABLE_DTYPE
+    assert [loaded.polarity(w) for w in ["FUNNY", "dull", "zzz", "new"]] \
+        == [polarity.POSITIVE, polarity.NEGATIVE, polarity.UNKNOWN,
+            polarity.UNKNOWN]
+    assert fe.extract("funny funny") == 1.0
+    # A loaded table never falls back to SentiWordNet
+    assert looked_up == ["funny", "dull", "zzz"]
+
+
+def test_polarity_table_bounded(monkeypatch):
+    looked_up = []
+    monkeypatch.setattr(polarity, "sentiwordnet_polarity",
+                        lambda word: looked_up.append(word) or
+                        polarity.UNKNOWN)
+
+    table = polarity.PolarityTable(max_entries=2)
+    for w in ["a", "b", "a", "c", "a", "b"]:
+        table.polarity(w)
+
+    # "b" was the least recently used word when "c" was added
+    assert looked_up == ["a", "b", "c", "b"]
+    assert list(table.memo) == ["a", "b"]
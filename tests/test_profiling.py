@@ -0,0 +1,31 @@
+# tests/test_profiling.py
+
+import os
+import pstats
+
+from tests.helpers import training_data
+
+
+def test_profiling(meter, tmpdir):
+    meter.set_classifier_keys()
+    meter.set_handler(lambda data: None)
+    meter.enable_profiling(stages=["extract", "classify",
+                                   "preclass/hashtag-count"],
+                           max_records=3, memory=True,
+                           directory=str(tmpdir))
+    meter.extract_features(training_data()[0])
+    for t in training_data()[0]:
+        meter.new_input({"text": t})
+
+    report = meter.profiler.report()
+    assert set(report.keys()) == {"extract", "classify",
+                                  "preclass/hashtag-count"}
+    assert report["classify"]["records"] == 3
+    assert report["extract"]["records"] == len(training_data()[0])
+
+    files = meter.disable_profiling()
+    assert meter.profiler is None
+    assert os.path.join(str(tmpdir), "classify.prof") in files
+    assert os.path.join(str(tmpdir),
+                        "preclass.hashtag-count.alloc.txt") in files
+    pstats.Stats(os.path.join(str(tmpdir), "classify.prof"))
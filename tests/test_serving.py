@@ -0,0 +1,87 @@
+# tests/test_serving.py
+
+import os
+
+import socialmeter as sm
+
+from socialmeter.dispatch import InputDispatcher
+from socialmeter.serving import ShardedServer
+
+from tests.helpers import training_data
+
+
+class DyingPreprocessor(sm.chain_links.Module):
+    """
+    Kills the worker process on the text "die".
+    """
+    key = "dying"
+
+    def process(self, data):
+        if data["text"] == "die":
+            os._exit(1)
+        return data
+
+
+def test_sharded_server(stream):
+    meter, inputs, results = stream()
+    server = meter.start_sharded_if_ready(n_workers=3, batch_size=4)
+
+    assert [r["username"] for r in results] == \
+        [i["username"] for i in inputs]
+    assert [r["classification"] for r in results] == \
+        list(meter.classify_many([i["text"] for i in inputs]))
+    stats = server.stats()
+    assert sum(s["records"] for s in stats.values()) == len(inputs)
+    assert all(s["errors"] == 0 for s in stats.values())
+    assert not any(h["alive"] for h in server.health())
+
+
+def test_sharded_server_unordered(stream):
+    meter, inputs, results = stream(repeat=3)
+    ShardedServer(meter, n_workers=2, batch_size=5, ordered=False).start()
+
+    assert sorted(r["username"] for r in results) == \
+        sorted(i["username"] for i in inputs)
+
+
+def test_sharded_server_dead_worker(stream):
+    texts = training_data()[0] * 2
+    texts[5] = "die"
+    meter, inputs, results = stream(texts=texts, stop_words=False)
+    meter.add_preprocess_mod(DyingPreprocessor())
+
+    server = meter.start_sharded_if_ready(n_workers=2, batch_size=2)
+
+    # The batch of u4 and u5 was lost, the rest is output in order
+    assert [r["username"] for r in results] == \
+        [i["username"] for i in inputs if i["username"] not in ("u4", "u5")]
+    assert sum(s["lost_batches"] for s in server.stats().values()) == 1
+
+
+def test_sharded_server_every_worker_dead(stream):
+    meter, inputs, results = stream(texts=["die"] * 20, stop_words=False)
+    meter.add_preprocess_mod(DyingPreprocessor())
+    dispatcher = InputDispatcher()
+    meter.set_dispatcher(dispatcher)
+
+    # The queue fills up once the only worker has died, the input must
+    # not block on it forever
+    server = ShardedServer(meter, n_workers=1, batch_size=1, queue_size=2)
+    server.start()
+
+    assert results == []
+    assert server.dropped > 0
+    assert meter.input_mod.handler == dispatcher.submit
+
+
+def test_sharded_server_output_columns(stream):
+    meter, inputs, results = stream(repeat=1)
+    meter.set_output_columns(["username", "classification"])
+
+    meter.start_sharded_if_ready(n_workers=2, batch_size=2)
+
+    # The released columns stay released, as in the in-process chain
+    assert all(set(r.keys()) == {"username", "classification", "text"}
+               for r in results)
+    assert all(r["text"] == "(text not found)" for r in results)
+    assert results == meter.process_batch(inputs)
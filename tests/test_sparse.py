@@ -0,0 +1,49 @@
+# tests/test_sparse.py
+
+import scipy.sparse as sp
+
+import socialmeter as sm
+
+from socialmeter import preprocess as pp
+from socialmeter import preclass as pc
+from socialmeter import classif as cl
+from socialmeter import output as out
+from socialmeter.store import FeatureStore
+
+from tests.helpers import training_data
+
+
+def test_hashed_ngrams(tmpdir):
+    fe = pc.HashedNGramFE(n_features=2 ** 10, ngram_range=(1, 2))
+    meter = sm.SMeter()
+    meter.set_tokenizer("regex")
+    meter.set_column_format(["text", "classification"])
+    meter.add_preclass_mod(sm.FeatureExtractorModule(fe))
+    meter.add_preclass_mod(sm.FeatureExtractorModule(
+        pc.ExcessiveCapitalsFE()))
+    meter.set_class_mod(cl.MultinomialNBModule())
+    meter.set_output_mod(out.OutputModule())
+    meter.train(training_data())
+
+    texts = training_data()[0]
+    features = meter.extract_features(texts)
+    assert sp.issparse(features)
+    # The hashed n-grams, then one column for the capitals
+    assert features.shape == (len(texts), 2 ** 10 + 1)
+    # "this", "is", "bad", "this is" and "is bad"
+    assert features[1, :2 ** 10].sum() == 5
+
+    batch = meter.process_batch([{"text": t} for t in texts])
+    assert [d["classification"] for d in batch] == \
+        list(meter.classify_many(texts))
+
+    meter.set_feature_store(FeatureStore(str(tmpdir)))
+    meter.extract_features(texts)
+    stored = meter.extract_features(texts)
+    assert (stored != features).nnz == 0
+
+    chars = pc.HashedNGramFE(n_features=2 ** 10, ngram_range=(2, 3),
+                             analyzer="char")
+    assert chars.extract("abcd").sum() == 5
+    assert pp.NGramPreprocessor(2).extract("a b c") == \
+        [("a", "b"), ("b", "c")]
@@ -0,0 +1,23 @@
+# tests/test_store.py
+
+from socialmeter.store import FeatureStore
+
+from tests.helpers import training_data
+
+
+def test_feature_store(meter, tmpdir, monkeypatch):
+    texts = training_data()[0]
+    expected = meter.extract_features(texts)
+
+    meter.set_feature_store(FeatureStore(str(tmpdir)))
+    first = meter.extract_features(texts)
+
+    # The second run must come from the store, not from extraction
+    def fail(texts):
+        raise AssertionError("Features were extracted again.")
+    monkeypatch.setattr(meter, "_extract_cached_features", fail)
+    second = meter.extract_features(texts)
+
+    assert second.tolist() == first.tolist() == expected
+    assert second.filename is not None
+    meter.train((texts, training_data()[1]))
@@ -0,0 +1,33 @@
+# tests/test_tagger.py
+
+import nltk
+
+import socialmeter as sm
+
+from socialmeter import preclass as pc
+from socialmeter import tagger
+
+from tests.helpers import FakeTagger
+
+
+def test_batch_tagging(monkeypatch):
+    calls = {"tag": 0}
+    monkeypatch.setattr(nltk, "word_tokenize", lambda text: text.split(" "))
+    monkeypatch.setattr(tagger, "_tagger", FakeTagger(calls))
+    sents = []
+    monkeypatch.setattr(tagger, "pos_tag_sents", lambda token_lists: (
+        sents.append(len(token_lists)) or
+        [FakeTagger(calls).tag(t) for t in token_lists]))
+
+    meter = sm.SMeter()
+    meter.set_column_format(["text", "classification"])
+    meter.add_preclass_mod(sm.FeatureExtractorModule(pc.AdjectiveCounterFE()))
+    meter.add_preclass_mod(sm.FeatureExtractorModule(pc.WordCountFE()))
+    meter.set_parallelism(1, chunk_size=3)
+
+    texts = ["a funny test", "not funny", "plain", "funny funny", "x"]
+    features = meter.extract_features(texts)
+
+    assert features == [meter._extract_single_features(t) for t in texts]
+    assert sents == [3, 2]
+    assert tagger.pos_tag(["funny"]) == [("funny", "JJ")]
@@ -0,0 +1,49 @@
+# tests/test_tokenizers.py
+
+import socialmeter as sm
+
+from socialmeter import preprocess as pp
+from socialmeter import preclass as pc
+from socialmeter import tokenizers
+
+
+def test_regex_tokenizer():
+    tokenizer = tokenizers.RegexTokenizer()
+    assert tokenizer.tokenize(
+        "I don't like it!!! Can't stop... SO great :) #win @bob") == \
+        ["I", "do", "n't", "like", "it", "!", "!", "!", "Ca", "n't", "stop",
+         "...", "SO", "great", ":)", "#win", "@bob"]
+    assert tokenizer.tokenize("I cannot :D") == ["I", "can", "not", ":D"]
+
+    # A colon or equals sign before a word is not an emoticon
+    assert tokenizer.tokenize("ratio:Data") == ["ratio", ":", "Data"]
+    assert tokenizer.tokenize("x=price") == ["x", "=", "price"]
+    assert tokenizer.tokenize("5:Pacific") == ["5", ":", "Pacific"]
+
+
+def test_meter_tokenizer():
+    meter = sm.SMeter()
+    meter.set_column_format(["text", "classification"])
+    meter.add_preprocess_mod(sm.PreprocessorExtractorModule(
+        pp.TokenizerPreprocessor()))
+    meter.add_preclass_mod(sm.FeatureExtractorModule(
+        pc.NegativeInfluenceFE()))
+    signature = meter.feature_signature()
+    meter.set_tokenizer("regex")
+    assert meter.feature_signature() != signature
+
+    record = meter.format_input({"text": "it isn't bad"})
+    meter.preclass_link.process(meter.preprocess_link.process(record))
+    assert record["tokenize"] == ["it", "is", "n't", "bad"]
+    assert record["negative-influence"] == 1
+    assert meter.extract_features(["it isn't bad", "fine"]) == [[1], [0]]
+    assert meter.extract_features(["it cannot be bad"]) == [[1]]
+
+
+def test_default_tokenizer():
+    tokenizers.set_tokenizer("regex")
+    try:
+        assert pp.TokenizerPreprocessor().extract("a #b") == ["a", "#b"]
+    finally:
+        tokenizers.set_tokenizer(None)
+    assert isinstance(tokenizers.get_tokenizer(), tokenizers.NLTKTokenizer)